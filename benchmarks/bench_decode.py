@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+# Compare the full resolution decode used before with the reduced decode of
+# PicSimilarProc.reduce_for_hashing(): time per file and pHash distance between both paths.
+#
+# Usage (from the project root):
+#   python -m benchmarks.bench_decode [folder] [--count N] [--width W] [--height H]
+# Without a folder, a few synthetic JPEG/PNG/TIFF photos are generated in a temporary folder.
+
+import argparse
+import os
+import tempfile
+import time
+
+import imagehash
+import numpy as np
+from PIL import Image
+
+from src.pic_similar_proc import PicSimilarProc
+from .synthetic_corpus import make_synthetic_image
+
+def generate_corpus(folder, count, width, height):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        image = make_synthetic_image(rng, width, height)
+        for ext in (".jpg", ".png", ".tiff"):
+            path = os.path.join(folder, f"synthetic_{i:03d}{ext}")
+            if ext == ".jpg":
+                image.save(path, quality=90)
+            else:
+                image.save(path)
+            paths.append(path)
+    return paths
+
+def full_decode_hash(path):
+    with Image.open(path) as image:
+        return PicSimilarProc.hash_to_int(imagehash.phash(image))
+
+def reduced_decode_hash(proc, path):
+    with Image.open(path) as image:
+        return PicSimilarProc.hash_to_int(imagehash.phash(proc.reduce_for_hashing(image)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reduced resolution decode for pHash.")
+    parser.add_argument("folder", nargs="?", help="folder with images (default: synthetic corpus)")
+    parser.add_argument("--count", type=int, default=3, help="synthetic images per format")
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    args = parser.parse_args()
+
+    proc = PicSimilarProc()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.folder:
+            paths = proc.get_source_files(args.folder)
+        else:
+            paths = generate_corpus(temp_dir, args.count, args.width, args.height)
+
+        results = {}
+        for path in paths:
+            ext = os.path.splitext(path)[1].lower()
+
+            start = time.perf_counter()
+            full_hash = full_decode_hash(path)
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            reduced_hash = reduced_decode_hash(proc, path)
+            reduced_time = time.perf_counter() - start
+
+            stats = results.setdefault(ext, {"files": 0, "full": 0.0, "reduced": 0.0, "distances": []})
+            stats["files"] += 1
+            stats["full"] += full_time
+            stats["reduced"] += reduced_time
+            stats["distances"].append((full_hash ^ reduced_hash).bit_count())
+
+    print(f"{'format':<8}{'files':>6}{'full ms':>10}{'reduced ms':>12}{'speedup':>9}{'mean dist':>11}{'max dist':>10}")
+    for ext, stats in sorted(results.items()):
+        full_ms = stats["full"] / stats["files"] * 1000
+        reduced_ms = stats["reduced"] / stats["files"] * 1000
+        distances = stats["distances"]
+        print(f"{ext:<8}{stats['files']:>6}{full_ms:>10.1f}{reduced_ms:>12.1f}{full_ms / reduced_ms:>8.1f}x"
+              f"{sum(distances) / len(distances):>11.2f}{max(distances):>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+# Benchmark suite on a deterministic synthetic corpus (see synthetic_corpus.py):
+#   get_source_files    folder listing                          files/s
+#   images_are_similar  near-duplicate and unrelated pairs      pairs/s
+#   raws_are_similar    DNG pairs with the same sensor data     pairs/s
+#   scan_cold           full headless scan (ScanEngine), empty fingerprint store   files/s
+#   scan_warm           the same scan again, fingerprints and listings reused      files/s
+# Each benchmark runs in a fresh process (ru_maxrss only ever grows), which reports its own peak RSS
+# and the one of its fingerprinting processes.
+# The results are saved as JSON, and --compare prints the change against an earlier result.
+#
+# Usage (from the project root):
+#   python -m benchmarks.bench_suite [--count N] [--raw-count N] [--scale S] [--workers N]
+#                                    [--output FILE] [--compare FILE]
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# not available on Windows: no peak RSS there
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from src.pic_similar_proc import PicSimilarProc
+from src.scan_engine import ScanEngine
+from src.app_configs import AppConfigs
+from src.settings.pic_constants import PicConst
+from .synthetic_corpus import generate_corpus
+
+_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Throughput of each benchmark, used by --compare
+_RATE_KEYS = ("files_per_s", "pairs_per_s")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# (this process, finished child processes) peak resident set size in MB, since the start of the process
+def peak_rss_mb():
+    if resource is None:
+        return None, None
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (own_peak_rss_mb(unit),
+            round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1))
+
+# On Linux, ru_maxrss of a new process starts with the peak of the process which started it (it is kept
+# through fork and exec), VmHWM is the peak of this process image only
+def own_peak_rss_mb(unit):
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1)
+
+def measure(func):
+    start = time.perf_counter()
+    count, extra = func()
+    seconds = time.perf_counter() - start
+    rss, children_rss = peak_rss_mb()
+    return seconds, count, extra, {"peak_rss_mb": rss, "children_peak_rss_mb": children_rss}
+
+# Run bench_func(*args) in a fresh process and return its result, so the peak RSS is the benchmark's own
+def run_isolated(bench_func, *args):
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_benchmark, args=(sender, bench_func, args))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = None
+    process.join()
+    if result is None:
+        raise RuntimeError(f"{bench_func.__name__} ended without a result (exit code {process.exitcode})")
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+def _run_benchmark(sender, bench_func, args):
+    try:
+        sender.send(bench_func(*args))
+    except Exception as e:
+        sender.send(e)
+    finally:
+        sender.close()
+
+def bench_get_source_files(folder, repeat):
+    proc = PicSimilarProc()
+    extensions = PicConst.IMG_EXTENSIONS | PicConst.RAW_EXTENSIONS
+    def run():
+        files = []
+        for _ in range(repeat):
+            files = proc.get_source_files(folder, extensions, recursive=True)
+        return len(files) * repeat, {"files": len(files)}
+    seconds, count, extra, rss = measure(run)
+    return {"seconds": seconds, "files_per_s": count / seconds, **extra, **rss}
+
+def bench_pairs(compare, pairs, expected):
+    def run():
+        matches = sum(1 for file1, file2 in pairs if compare(file1, file2))
+        return len(pairs), {"pairs": len(pairs), "matches": matches, "expected_matches": expected}
+    seconds, count, extra, rss = measure(run)
+    return {"seconds": seconds, "pairs_per_s": count / seconds, **extra, **rss}
+
+def bench_images_are_similar(pairs, expected):
+    proc = PicSimilarProc()
+    cutoff = AppConfigs.make_scan_options()["PHASH_CUTOFF"]
+    return bench_pairs(lambda file1, file2: proc.images_are_similar(file1, file2, cutoff), pairs, expected)
+
+def bench_raws_are_similar(pairs, expected):
+    return bench_pairs(PicSimilarProc().raws_are_similar, pairs, expected)
+
+def bench_scan(target, scan, file_count, workers, db_path):
+    scan_scope = {"IMAGE": True, "RAW": True, "VIDEO": False}
+    extension_filters = {"Image": PicConst.IMG_EXTENSIONS, "Raw": PicConst.RAW_EXTENSIONS, "Video": PicConst.VIDEO_EXTENSIONS}
+    options = AppConfigs.make_scan_options({"WORKERS": workers})
+    def run():
+        matches = []
+        # the workers must have exited (been reaped) before their peak RSS is read
+        engine = ScanEngine(target, scan, scan_scope, extension_filters, options, on_match=matches.append,
+                            db_path=db_path, stats_path=os.path.join(os.path.dirname(db_path), "scan_stats.jsonl"),
+                            shutdown_wait=True)
+        engine.run()
+        # where the scan spent its time (see ScanStats)
+        stats = engine.stats.snapshot()
+        return file_count, {"files": file_count, "matches": len(matches), "stages_ms": stats["stages_ms"],
+                            "decode_ms": stats["decode_ms"], "hash_ms": stats["hash_ms"]}
+    seconds, count, extra, rss = measure(run)
+    return {"seconds": seconds, "files_per_s": count / seconds, **extra, **rss}
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<20}{'seconds':>9}{'rate':>18}{'peak MB':>9}{'children MB':>13}{'vs baseline':>13}")
+    for name, bench in results["benchmarks"].items():
+        rate_key = next(key for key in _RATE_KEYS if key in bench)
+        rate = f"{bench[rate_key]:.1f} {rate_key.split('_')[0]}/s"
+        change = ""
+        old = (baseline or {}).get("benchmarks", {}).get(name, {}).get(rate_key)
+        if old:
+            change = f"{bench[rate_key] / old:.2f}x"
+        print(f"{name:<20}{bench['seconds']:>9.2f}{rate:>18}{bench['peak_rss_mb'] or '-':>9}"
+              f"{bench['children_peak_rss_mb'] or '-':>13}{change:>13}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PicDupScan on a synthetic corpus.")
+    parser.add_argument("--count", type=int, default=4, help="photos per resolution")
+    parser.add_argument("--raw-count", type=int, default=4, help="synthetic DNGs")
+    parser.add_argument("--scale", type=float, default=0.5, help="factor of the corpus resolutions")
+    parser.add_argument("--workers", type=int, default=0, help="fingerprinting processes, 0 = CPU count")
+    parser.add_argument("--repeat", type=int, default=20, help="listings timed by get_source_files")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {"count": args.count, "raw_count": args.raw_count, "scale": args.scale},
+        "workers": args.workers,
+        "benchmarks": {},
+    }
+    benchmarks = results["benchmarks"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = os.path.join(temp_dir, "corpus")
+        corpus = generate_corpus(corpus_dir, args.count, args.raw_count, args.scale)
+        originals_dir, duplicates_dir = os.path.join(corpus_dir, "originals"), os.path.join(corpus_dir, "duplicates")
+        file_count = len(corpus["originals"]) + len(corpus["duplicates"])
+
+        benchmarks["get_source_files"] = run_isolated(bench_get_source_files, corpus_dir, args.repeat)
+        benchmarks["images_are_similar"] = run_isolated(bench_images_are_similar, corpus["image_pairs"] + corpus["unrelated_pairs"],
+                                                        len(corpus["image_pairs"]))
+        benchmarks["raws_are_similar"] = run_isolated(bench_raws_are_similar, corpus["raw_pairs"], len(corpus["raw_pairs"]))
+
+        db_path = os.path.join(temp_dir, "fingerprints.db")
+        benchmarks["scan_cold"] = run_isolated(bench_scan, originals_dir, duplicates_dir, file_count, args.workers, db_path)
+        benchmarks["scan_warm"] = run_isolated(bench_scan, originals_dir, duplicates_dir, file_count, args.workers, db_path)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(_RESULTS_DIR, f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+# Deterministic synthetic photo corpus for the benchmarks: the same arguments always give
+# the same files, so timings of different commits are comparable.
+#
+#   originals/   JPEG, PNG and TIFF photos at several resolutions, and synthetic DNGs
+#   duplicates/  a near-duplicate of each photo (resized, rotated or recompressed),
+#                unrelated photos, and a copy of each DNG with other metadata but the same
+#                sensor data
+
+import os
+import struct
+
+import numpy as np
+from PIL import Image
+
+RESOLUTIONS = ((640, 480), (1920, 1280), (4000, 3000))
+FORMATS = (".jpg", ".png", ".tiff")
+VARIANTS = ("resized", "rotated", "recompressed")
+
+# Smooth, photo-like content (noise would make the hash meaningless)
+def make_synthetic_image(rng, width, height):
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    channels = []
+    for _ in range(3):
+        fx, fy, phase = rng.uniform(1, 6), rng.uniform(1, 6), rng.uniform(0, np.pi)
+        channels.append(127 + 100 * np.sin(x / width * fx * np.pi + phase) * np.cos(y / height * fy * np.pi))
+    return Image.fromarray(np.dstack(channels).clip(0, 255).astype(np.uint8), "RGB")
+
+def save_image(image, path):
+    if path.lower().endswith(".jpg"):
+        image.save(path, quality=90)
+    else:
+        image.save(path)
+
+def make_variant(image, variant):
+    if variant == "resized":
+        return image.resize((image.width // 2, image.height // 2), Image.Resampling.LANCZOS), None
+    if variant == "rotated":
+        return image.transpose(Image.Transpose.ROTATE_90), None
+    # recompressed: always saved as a low quality JPEG
+    return image, ".jpg"
+
+# TIFF field types
+_BYTE, _ASCII, _SHORT, _LONG, _RATIONAL, _SRATIONAL = 1, 2, 3, 4, 5, 10
+_TYPE_FORMATS = {_BYTE: "B", _ASCII: "B", _SHORT: "H", _LONG: "I", _RATIONAL: "II", _SRATIONAL: "ii"}
+
+# Minimal uncompressed DNG (12-bit RGGB Bayer data, no embedded preview) which LibRaw can read
+def write_synthetic_dng(path, image, model="Synthetic"):
+    rgb = np.asarray(image, dtype=np.uint16) << 4
+    height, width = rgb.shape[0] & ~1, rgb.shape[1] & ~1
+    cfa = np.empty((height, width), dtype="<u2")
+    cfa[0::2, 0::2] = rgb[0:height:2, 0:width:2, 0]
+    cfa[0::2, 1::2] = rgb[0:height:2, 1:width:2, 1]
+    cfa[1::2, 0::2] = rgb[1:height:2, 0:width:2, 1]
+    cfa[1::2, 1::2] = rgb[1:height:2, 1:width:2, 2]
+    strip = cfa.tobytes()
+
+    tags = [
+        (254, _LONG, [0]),                          # NewSubFileType: main image
+        (256, _LONG, [width]),
+        (257, _LONG, [height]),
+        (258, _SHORT, [16]),                        # BitsPerSample
+        (259, _SHORT, [1]),                         # Compression: none
+        (262, _SHORT, [32803]),                     # PhotometricInterpretation: CFA
+        (271, _ASCII, b"PicDupScan\0"),             # Make
+        (272, _ASCII, model.encode() + b"\0"),      # Model
+        (273, _LONG, [0]),                          # StripOffsets, set below
+        (274, _SHORT, [1]),                         # Orientation
+        (277, _SHORT, [1]),                         # SamplesPerPixel
+        (278, _LONG, [height]),                     # RowsPerStrip
+        (279, _LONG, [len(strip)]),                 # StripByteCounts
+        (284, _SHORT, [1]),                         # PlanarConfiguration
+        (33421, _SHORT, [2, 2]),                    # CFARepeatPatternDim
+        (33422, _BYTE, [0, 1, 1, 2]),               # CFAPattern: RGGB
+        (50706, _BYTE, [1, 4, 0, 0]),               # DNGVersion
+        (50707, _BYTE, [1, 1, 0, 0]),               # DNGBackwardVersion
+        (50708, _ASCII, b"PicDupScan Synthetic\0"), # UniqueCameraModel
+        (50714, _LONG, [0]),                        # BlackLevel
+        (50717, _LONG, [4095]),                     # WhiteLevel
+        (50721, _SRATIONAL, [1, 1, 0, 1, 0, 1, 0, 1, 1, 1, 0, 1, 0, 1, 0, 1, 1, 1]),  # ColorMatrix1: identity
+        (50728, _RATIONAL, [1, 1, 1, 1, 1, 1]),     # AsShotNeutral
+        (50778, _SHORT, [21]),                      # CalibrationIlluminant1: D65
+    ]
+
+    ifd_size = 2 + len(tags) * 12 + 4
+    data_offset = 8 + ifd_size
+    entries = []
+    extra = b""
+    for tag, field_type, values in tags:
+        fmt = _TYPE_FORMATS[field_type]
+        raw = bytes(values) if field_type == _ASCII else struct.pack("<" + fmt * (len(values) // len(fmt)), *values)
+        count = len(raw) // struct.calcsize("<" + fmt)
+        entries.append((tag, field_type, count, raw))
+        if len(raw) > 4:
+            extra += raw + b"\0" * (len(raw) % 2)
+    strip_offset = data_offset + len(extra)
+
+    ifd = struct.pack("<H", len(entries))
+    extra_offset = data_offset
+    for tag, field_type, count, raw in entries:
+        if tag == 273:
+            raw = struct.pack("<I", strip_offset)
+        if len(raw) > 4:
+            ifd += struct.pack("<HHII", tag, field_type, count, extra_offset)
+            extra_offset += len(raw) + len(raw) % 2
+        else:
+            ifd += struct.pack("<HHI", tag, field_type, count) + raw.ljust(4, b"\0")
+    ifd += struct.pack("<I", 0)
+
+    with open(path, "wb") as f:
+        f.write(b"II*\0" + struct.pack("<I", 8) + ifd + extra + strip)
+
+# Generate the corpus in folder.
+# count: photos per resolution, raw_count: DNGs, scale: factor of the resolutions
+# Returns {"originals": [...], "duplicates": [...], "image_pairs": [(original, near-duplicate)],
+#          "unrelated_pairs": [(original, unrelated photo)], "raw_pairs": [(dng, same sensor data)]}
+def generate_corpus(folder, count=4, raw_count=4, scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    originals_dir = os.path.join(folder, "originals")
+    duplicates_dir = os.path.join(folder, "duplicates")
+    os.makedirs(originals_dir, exist_ok=True)
+    os.makedirs(duplicates_dir, exist_ok=True)
+    corpus = {"originals": [], "duplicates": [], "image_pairs": [], "unrelated_pairs": [], "raw_pairs": []}
+
+    index = 0
+    for width, height in RESOLUTIONS:
+        width, height = max(64, int(width * scale)), max(64, int(height * scale))
+        for _ in range(count):
+            ext = FORMATS[index % len(FORMATS)]
+            # shifted every round of formats, so each format gets each variant
+            variant = VARIANTS[(index + index // len(FORMATS)) % len(VARIANTS)]
+            image = make_synthetic_image(rng, width, height)
+            original = os.path.join(originals_dir, f"photo_{index:03d}_{width}x{height}{ext}")
+            save_image(image, original)
+
+            duplicate_image, duplicate_ext = make_variant(image, variant)
+            duplicate = os.path.join(duplicates_dir, f"photo_{index:03d}_{variant}{duplicate_ext or ext}")
+            if variant == "recompressed":
+                duplicate_image.save(duplicate, quality=60)
+            else:
+                save_image(duplicate_image, duplicate)
+
+            unrelated = os.path.join(duplicates_dir, f"other_{index:03d}{ext}")
+            save_image(make_synthetic_image(rng, width, height), unrelated)
+
+            corpus["originals"].append(original)
+            corpus["duplicates"] += [duplicate, unrelated]
+            corpus["image_pairs"].append((original, duplicate))
+            corpus["unrelated_pairs"].append((original, unrelated))
+            index += 1
+
+    raw_width, raw_height = max(64, int(RESOLUTIONS[1][0] * scale)), max(64, int(RESOLUTIONS[1][1] * scale))
+    for i in range(raw_count):
+        image = make_synthetic_image(rng, raw_width, raw_height)
+        original = os.path.join(originals_dir, f"raw_{i:03d}.dng")
+        copy = os.path.join(duplicates_dir, f"raw_{i:03d}_retagged.dng")
+        write_synthetic_dng(original, image)
+        write_synthetic_dng(copy, image, model="Synthetic Retagged")
+        corpus["originals"].append(original)
+        corpus["duplicates"].append(copy)
+        corpus["raw_pairs"].append((original, copy))
+
+    return corpus
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+# no PyQt6 import anywhere on this path: runs on headless servers and from cron
+from src.log_proc import Logger
+from src.scan_engine import ScanEngine
+from src.scan_result_writer import ScanResultWriter
+from src.app_configs import AppConfigs
+from src.settings.pic_constants import PicConst
+
+# Scope names of the command line -> (scan scope key, extension filter key, default extensions)
+_SCOPES = {
+    "image": ("IMAGE", "Image", PicConst.IMG_EXTENSIONS),
+    "raw": ("RAW", "Raw", PicConst.RAW_EXTENSIONS),
+    "video": ("VIDEO", "Video", PicConst.VIDEO_EXTENSIONS),
+}
+
+def _split_list(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Find duplicate images, raws and videos without the GUI. "
+                    "Without a scan folder, the duplicates within the target folder are grouped.")
+    parser.add_argument("target", help="target folder")
+    parser.add_argument("scan", nargs="?", help="folder to compare the target folder with")
+    parser.add_argument("--scope", help="comma separated scopes of image, raw, video (default: settings.conf)")
+    for name in _SCOPES:
+        parser.add_argument(f"--{name}-ext", help=f"comma separated {name} extensions, e.g. .jpg,.png (default: settings.conf)")
+    parser.add_argument("--workers", type=int, help="fingerprinting processes, 0 = CPU count (default: settings.conf)")
+    parser.add_argument("--format", choices=ScanResultWriter.FORMATS, default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--stats", help="file the scan statistics are appended to as JSON (default: log/scan_stats.jsonl)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the log to stderr")
+    parser.add_argument("-v", "--verbose", action="store_true", help="also log every fingerprinted file (DEBUG level)")
+    args = parser.parse_args(argv)
+
+    for folder in (args.target, args.scan):
+        if folder is not None and not os.path.isdir(folder):
+            parser.error(f"folder does not exist: {folder}")
+    if args.scope is not None and not set(_split_list(args.scope)) <= set(_SCOPES):
+        parser.error(f"invalid scope: {args.scope} (choose from {', '.join(_SCOPES)})")
+    if args.workers is not None and args.workers < 0:
+        parser.error("--workers must be 0 or more")
+    return args
+
+# settings.conf, overridden by the arguments
+def build_scan_settings(args):
+    scan_scope = AppConfigs.get_scan_scope() or {key: key != "VIDEO" for key, _, _ in _SCOPES.values()}
+    if args.scope is not None:
+        scopes = set(_split_list(args.scope))
+        scan_scope = {key: name in scopes for name, (key, _, _) in _SCOPES.items()}
+
+    extension_filters = AppConfigs.get_scan_extensions(as_set=True) or {}
+    for name, (_, filter_key, default_exts) in _SCOPES.items():
+        exts = getattr(args, f"{name}_ext")
+        if exts is not None:
+            extension_filters[filter_key] = set(_split_list(exts))
+        elif not extension_filters.get(filter_key):
+            extension_filters[filter_key] = set(default_exts)
+
+    scan_options = AppConfigs.get_scan_options()
+    if args.workers is not None:
+        scan_options["WORKERS"] = args.workers
+    return scan_scope, extension_filters, scan_options
+
+# =========================================================
+# Command line scanner: the same ScanEngine as the GUI, the results are streamed as they are found
+# =========================================================
+def main(argv=None):
+    args = parse_args(argv)
+
+    # stdout is for the results only
+    Logger.setTerminalDisplay(False)
+    Logger.setFileOutput(True)
+    Logger.setMinLevel(Logger.LOG_LV_DEBUG if args.verbose else AppConfigs.get_log_level())
+    if not args.quiet:
+        Logger.setCallback(lambda msg: print(msg, file=sys.stderr))
+
+    scan_folder = args.scan
+    # the same folder on both sides: find the duplicates within it
+    if scan_folder is not None and os.path.realpath(scan_folder) == os.path.realpath(args.target):
+        scan_folder = None
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        writer = ScanResultWriter(output, args.format)
+        engine = ScanEngine(args.target, scan_folder, *build_scan_settings(args),
+                            on_duplicate=writer.write_pair, on_group=writer.write_group, stats_path=args.stats)
+        try:
+            engine.run()
+        except KeyboardInterrupt:
+            return 130
+        writer.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    # the scan logs its error and ends, the caller (e.g. cron) still has to see the failure
+    if engine.error is not None:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    # needed by the fingerprinting process pool when packaged with pyinstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
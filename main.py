@@ -2,18 +2,42 @@
 # -*- coding: utf-8 -*-
 # ===============================================================================================
 
+import time
+_START_TIME = time.perf_counter()   # before any other import, for the startup timing report
+
 import sys
-from PyQt6.QtWidgets import QApplication
-from src.qt_picdupscan_gui import PicDupScanGUI
+import multiprocessing
+
+from src.startup_timer import StartupTimer
 
 # =========================================================
 # Main function to run the application
 # =========================================================
 def main():
-    app = QApplication(sys.argv)
-    window = PicDupScanGUI()
-    window.show()
+    # The Qt and GUI imports are here, not at the top: the fingerprinting processes import
+    # this module too and only need the scan modules
+    timer = StartupTimer(_START_TIME)
+    with timer.stage("import PyQt6"):
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+    with timer.stage("import GUI"):
+        from src.qt_picdupscan_gui import PicDupScanGUI
+        from src.app_configs import AppConfigs
+        from src.log_proc import Logger
+    Logger.setTerminalDisplay(True)
+    Logger.setFileOutput(True)
+    Logger.setMinLevel(AppConfigs.get_log_level())
+
+    with timer.stage("QApplication"):
+        app = QApplication(sys.argv)
+    with timer.stage("main window"):
+        window = PicDupScanGUI()
+        window.show()
+    # runs once the event loop has shown the window
+    QTimer.singleShot(0, timer.finish)
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # needed by the fingerprinting process pool when packaged with pyinstaller
+    multiprocessing.freeze_support()
+    main()
@@ -2,17 +2,56 @@
 # -*- coding: utf-8 -*-
 # ===============================================================================================
 import os
+import sys
 import logging
 
 from .gn_config import gn_ConfRW
 from .settings.pic_constants import PicConst
+from .metadata_prefilter import MetadataPrefilter
+from .log_proc import Logger
 
 class AppConfigs:
 
     _CONFIG_PATH = os.path.join(os.getcwd(), 'config', 'settings.conf')
+    _FINGERPRINT_DB_PATH = os.path.join(os.getcwd(), 'config', 'fingerprints.db')
 
     _SECTION_CONFIG_SCAN_EXT_SCOPE = "SCAN_EXTENSIONS_SCOPE"
     _SECTION_CONFIG_SCAN_EXT = 'SCAN_EXTENSIONS'
+    _SECTION_CONFIG_SCAN_OPTIONS = 'SCAN_OPTIONS'
+    _SECTION_CONFIG_LOG = 'LOG'
+
+    # Minimum level of the log records (a Logger level name), used when settings.conf has none
+    _DEFAULT_LOG_LEVEL = "INFO"
+
+    RAW_MATCH_MODES = ("exact", "preview")
+
+    # Default values of the SCAN_OPTIONS section, used for keys missing in settings.conf.
+    # The type of the default decides how the config string is parsed.
+    _DEFAULT_SCAN_OPTIONS = {
+        "HASH_CASCADE": "phash",    # hashes of PicConst.HASH_NAMES, e.g. "dhash, phash, whash":
+                                    # the first generates the candidates, the next ones confirm them
+        "AHASH_CUTOFF": 10,         # images are similar when the hash distance is below the cutoff
+        "DHASH_CUTOFF": 10,
+        "PHASH_CUTOFF": 10,
+        "WHASH_CUTOFF": 10,
+        "COLORHASH_CUTOFF": 4,
+        "MATCH_MIRRORED": False,    # also match mirrored (flipped) images
+        "WORKERS": 0,               # fingerprinting processes, 0 = CPU count
+        "RAW_MATCH_MODE": "exact",  # exact: identical sensor data, preview: similar embedded previews
+        "PREFILTER_RULES": "mode, frames, aspect",  # header-only rules pruning image pairs, empty = none
+        "ASPECT_TOLERANCE": 0.1,    # relative aspect ratio difference allowed by the "aspect" rule
+        "RECURSIVE": True,          # also scan the subdirectories
+        "INCLUDE_GLOBS": "",        # e.g. "2023/*, *_edit.jpg": only scan the matching files, empty = all
+        "EXCLUDE_GLOBS": "",        # e.g. "@eaDir, .thumbnails, *.tmp": skip the matching files and directories
+        "WALK_THREADS": 8,          # directories listed concurrently
+        "DIR_CACHE": True,          # reuse the listings of unchanged directories (their files are still stat'ed)
+        "WATCH_DEBOUNCE": 2.0,      # watch mode: seconds without change before a new file is fingerprinted
+        "WATCH_POLL_INTERVAL": 30.0,  # watch mode without watchdog: seconds between two walks of the folders
+        "VIDEO_SAMPLES": 8,         # keyframes hashed per video (their distance cutoff is PHASH_CUTOFF)
+        "VIDEO_DURATION_TOLERANCE": 0.02,  # relative duration difference allowed between similar videos
+        "STATS_INTERVAL": 1.0,      # seconds between two live scan statistics, 0 = only the final report
+        "PROGRESS_LOG_RATE": 2.0,   # fingerprinting progress records logged per second at most (each file: DEBUG level)
+    }
 
 
 
@@ -48,6 +87,39 @@ class AppConfigs:
         except Exception as e:
             raise Exception(f"Failed to write app config to config: {e}. Using defaults.")
 
+    # The fingerprint index is kept next to settings.conf
+    @staticmethod
+    def get_fingerprint_db_path():
+        return AppConfigs._FINGERPRINT_DB_PATH
+
+    # Fingerprint index of the programs using the scan as a library (no settings.conf, no working
+    # directory of their own): in the cache directory of the user
+    @staticmethod
+    def get_user_fingerprint_db_path():
+        if sys.platform == "win32":
+            cache_dir = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        elif sys.platform == "darwin":
+            cache_dir = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+        else:
+            cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+        return os.path.join(cache_dir, "PicDupScan", "fingerprints.db")
+
+    # Logger level constant of the LEVEL key of the LOG section
+    @staticmethod
+    def get_log_level():
+        try:
+            conf_data = AppConfigs._read_app_config(AppConfigs._SECTION_CONFIG_LOG)
+            level_str = conf_data.get("LEVEL", AppConfigs._DEFAULT_LOG_LEVEL)
+        except Exception as e:
+            logging.warning(f"Failed to read log level from config: {e}. Using default.")
+            level_str = AppConfigs._DEFAULT_LOG_LEVEL
+
+        lv_const = Logger.levelFromText(level_str)
+        if lv_const is None:
+            logging.warning(f"Invalid log level: {level_str}. Using default {AppConfigs._DEFAULT_LOG_LEVEL}.")
+            lv_const = Logger.levelFromText(AppConfigs._DEFAULT_LOG_LEVEL)
+        return lv_const
+
     @staticmethod
     def get_scan_scope():
         try:
@@ -85,6 +157,87 @@ class AppConfigs:
             logging.warning(f"Failed to write app config to config: {e}. Using defaults.")
             return False
 
+    @staticmethod
+    def get_scan_options():
+        options = dict(AppConfigs._DEFAULT_SCAN_OPTIONS)
+        try:
+            conf_data = AppConfigs._read_app_config(AppConfigs._SECTION_CONFIG_SCAN_OPTIONS)
+        except Exception as e:
+            logging.warning(f"Failed to read scan options from config: {e}. Using defaults.")
+            return AppConfigs.make_scan_options()
+
+        for key, default in AppConfigs._DEFAULT_SCAN_OPTIONS.items():
+            if key not in conf_data:
+                continue
+            try:
+                options[key] = AppConfigs._parse_option(conf_data[key], default)
+            except ValueError as e:
+                logging.warning(f"Invalid scan option {key}: {e}. Using default {default}.")
+        return AppConfigs.make_scan_options(options)
+
+    # Scan options without settings.conf (e.g. for find_duplicates): values has the keys of
+    # _DEFAULT_SCAN_OPTIONS (missing keys use the defaults); the lists may be comma separated
+    # strings as in settings.conf or sequences. Validated and converted like get_scan_options.
+    @staticmethod
+    def make_scan_options(values=None):
+        options = dict(AppConfigs._DEFAULT_SCAN_OPTIONS)
+        for key, value in (values or {}).items():
+            if key not in options:
+                raise ValueError(f"Unknown scan option: {key}")
+            options[key] = value
+
+        if options["RAW_MATCH_MODE"] not in AppConfigs.RAW_MATCH_MODES:
+            logging.warning(f"Invalid scan option RAW_MATCH_MODE: {options['RAW_MATCH_MODE']}. Using default.")
+            options["RAW_MATCH_MODE"] = AppConfigs._DEFAULT_SCAN_OPTIONS["RAW_MATCH_MODE"]
+
+        # convert the rules to a tuple
+        rules = AppConfigs._split_option(options["PREFILTER_RULES"])
+        if not set(rules) <= set(MetadataPrefilter.RULES):
+            logging.warning(f"Invalid scan option PREFILTER_RULES: {options['PREFILTER_RULES']}. Using default.")
+            rules = AppConfigs._split_option(AppConfigs._DEFAULT_SCAN_OPTIONS["PREFILTER_RULES"])
+        options["PREFILTER_RULES"] = rules
+
+        # convert the cascade to an ordered {hash name: cutoff}
+        hash_names = AppConfigs._split_option(options["HASH_CASCADE"])
+        if not hash_names or not set(hash_names) <= set(PicConst.HASH_NAMES) or len(set(hash_names)) != len(hash_names):
+            logging.warning(f"Invalid scan option HASH_CASCADE: {options['HASH_CASCADE']}. Using default.")
+            hash_names = AppConfigs._split_option(AppConfigs._DEFAULT_SCAN_OPTIONS["HASH_CASCADE"])
+        options["HASH_CASCADE"] = hash_names
+        options["HASH_CUTOFFS"] = {name: options[f"{name.upper()}_CUTOFF"] for name in hash_names}
+
+        # convert the globs to tuples
+        for key in ("INCLUDE_GLOBS", "EXCLUDE_GLOBS"):
+            options[key] = AppConfigs._split_option(options[key])
+        if options["WALK_THREADS"] < 1:
+            logging.warning(f"Invalid scan option WALK_THREADS: {options['WALK_THREADS']}. Using default.")
+            options["WALK_THREADS"] = AppConfigs._DEFAULT_SCAN_OPTIONS["WALK_THREADS"]
+        if options["PROGRESS_LOG_RATE"] < 0:
+            logging.warning(f"Invalid scan option PROGRESS_LOG_RATE: {options['PROGRESS_LOG_RATE']}. Using default.")
+            options["PROGRESS_LOG_RATE"] = AppConfigs._DEFAULT_SCAN_OPTIONS["PROGRESS_LOG_RATE"]
+        if options["VIDEO_SAMPLES"] < 1:
+            logging.warning(f"Invalid scan option VIDEO_SAMPLES: {options['VIDEO_SAMPLES']}. Using default.")
+            options["VIDEO_SAMPLES"] = AppConfigs._DEFAULT_SCAN_OPTIONS["VIDEO_SAMPLES"]
+        return options
+
+    # "a, b" or a sequence -> ("a", "b")
+    @staticmethod
+    def _split_option(value):
+        parts = value.split(",") if isinstance(value, str) else value
+        return tuple(part.strip() for part in parts if part.strip())
+
+    @staticmethod
+    def _parse_option(value, default):
+        value = value.strip()
+        if isinstance(default, bool):
+            if value not in {'0', '1'}:
+                raise ValueError("Data must be '0' or '1'")
+            return value == '1'
+        if isinstance(default, int):
+            return int(value)
+        if isinstance(default, float):
+            return float(value)
+        return value
+
     @staticmethod
     def get_scan_extensions(as_set =False):
         filters = {}
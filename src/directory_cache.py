@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .file_walker import FileStat
+
+@dataclass
+class DirectoryListing:
+    mtime_ns: int
+    inode: int
+    nlink: int                                  # 2 + number of subdirectories on POSIX file systems
+    files: list = field(default_factory=list)   # [(name, FileStat)] of every file, before any filter
+    dirs: list = field(default_factory=list)    # names of the subdirectories
+
+    # Adding, removing or renaming an entry changes the mtime of its directory
+    def matches(self, st):
+        return (self.mtime_ns, self.inode, self.nlink) == (st.st_mtime_ns, st.st_ino, st.st_nlink)
+
+    def to_dict(self):
+        return {"files": [[name, *file_stat] for name, file_stat in self.files], "dirs": self.dirs}
+
+    @staticmethod
+    def from_dict(mtime_ns, inode, nlink, data: dict):
+        files = [(name, FileStat(*file_stat)) for name, *file_stat in data["files"]]
+        return DirectoryListing(mtime_ns, inode, nlink, files, data["dirs"])
+
+# =========================================================
+# Directory listings of the last successful scan, so a rescan does not read the unchanged directories:
+# a directory whose mtime (and inode, link count) is unchanged reuses its stored listing instead of
+# being listed again.
+# A file edited in place does not change the mtime of its directory, so only the names of a
+# reused listing are trusted: FileWalker stats its files again.
+# Used by the FileWalker threads, so lookups and records are locked.
+# =========================================================
+class DirectoryCache:
+
+    # mtime resolution of the coarsest file systems (FAT): a directory changed less than this before
+    # the scan may change again without a new mtime, so its listing is not kept
+    _MTIME_RESOLUTION_NS = 2_000_000_000
+
+    def __init__(self, listings=None):
+        self._known = listings or {}    # {absolute path: DirectoryListing} from the store
+        self._updated = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._started_ns = time.time_ns()
+        self.reused_count = 0
+        self.listed_count = 0
+
+    # The listing of the directory if it did not change since it was recorded, else None
+    def lookup(self, path, st):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._seen.add(path)
+            listing = self._updated.get(path) or self._known.get(path)
+            if listing is not None and listing.matches(st):
+                self.reused_count += 1
+                return listing
+        return None
+
+    def record(self, path, st, files, dirs):
+        path = os.path.abspath(path)
+        with self._lock:
+            self.listed_count += 1
+            if st.st_mtime_ns > self._started_ns - DirectoryCache._MTIME_RESOLUTION_NS:
+                return
+            self._updated[path] = DirectoryListing(st.st_mtime_ns, st.st_ino, st.st_nlink, files, dirs)
+
+    # Listings to save after a successful scan
+    def updated_listings(self):
+        with self._lock:
+            return dict(self._updated)
+
+    # Stored directories which were not found by this scan (removed, or now excluded)
+    def stale_paths(self):
+        with self._lock:
+            return [path for path in self._known if path not in self._seen]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+# =========================================================
+# Union-find over file paths: every matched pair merges two groups,
+# so A == B and B == C end up in one group {A, B, C} instead of three pairs.
+# =========================================================
+class DuplicateGroups:
+
+    def __init__(self):
+        self._parent = {}
+        self._size = {}
+
+    def __len__(self):
+        return len(self._parent)
+
+    # Representative of the group of "path" (with path halving)
+    def find(self, path):
+        if path not in self._parent:
+            self._parent[path] = path
+            self._size[path] = 1
+            return path
+
+        while self._parent[path] != path:
+            self._parent[path] = self._parent[self._parent[path]]
+            path = self._parent[path]
+        return path
+
+    # Merge the groups of the two paths (union by size keeps the trees flat)
+    def union(self, path1, path2):
+        root1, root2 = self.find(path1), self.find(path2)
+        if root1 == root2:
+            return
+        if self._size[root1] < self._size[root2]:
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._size[root1] += self._size[root2]
+
+    # Sorted paths of the group of "path"
+    def group_of(self, path):
+        root = self.find(path)
+        return sorted(member for member in self._parent if self.find(member) == root)
+
+    # Groups of at least two paths, each sorted, sorted by their first path
+    def groups(self):
+        members = {}
+        for path in self._parent:
+            members.setdefault(self.find(path), []).append(path)
+        return sorted(sorted(group) for group in members.values() if len(group) > 1)
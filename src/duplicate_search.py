@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import os
+import queue
+import threading
+from typing import Iterator
+
+from .scan_engine import ScanEngine, Match, CancelToken
+from .app_configs import AppConfigs
+from .settings.pic_constants import PicConst
+
+# Extensions of each scope when none are given
+_DEFAULT_EXTENSIONS = {
+    "IMAGE": PicConst.IMG_EXTENSIONS,
+    "RAW": PicConst.RAW_EXTENSIONS,
+    "VIDEO": PicConst.VIDEO_EXTENSIONS,
+}
+
+# Scope key -> key of the extension filters used by ScanEngine (and settings.conf)
+_FILTER_KEYS = {"IMAGE": "Image", "RAW": "Raw", "VIDEO": "Video"}
+
+# Matches found ahead of the caller: the search waits while this many are not taken yet
+_QUEUE_SIZE = 1000
+# How often a search waiting for the caller checks the cancel token (seconds)
+_PUT_TIMEOUT = 0.1
+
+# =========================================================
+# Duplicate search for other programs, without Qt and without settings.conf.
+# Runs the same ScanEngine as the GUI in a background thread and yields every matched pair
+# as soon as it is found:
+#   targets:  folder to search
+#   scans:    folder to compare it with, None: the duplicates within targets
+#             (each matched pair is yielded, DuplicateGroups merges them into groups)
+#   options:  scan options, see AppConfigs.make_scan_options (missing keys use the defaults)
+#   scope:    scopes to scan, of "IMAGE", "RAW", "VIDEO"
+#   extensions: {scope: set of extensions}, missing scopes use PicConst
+#   cancel_token: CancelToken, cancel() ends the search (closing the iterator cancels it too)
+#   progress: progress(fingerprinted files, files to fingerprint), called from the search thread
+#   db_path:  fingerprint store, None: AppConfigs.get_user_fingerprint_db_path (the user's cache directory)
+#   stats_path: file the scan statistics are appended to, None: no statistics file
+# Nothing is written to the working directory, and the log is neither printed nor saved unless the
+# program turns it on (see Logger). Errors which end the search (a missing folder, an unreadable
+# fingerprint store, ...) are raised from the iterator, after the matches found before them.
+# =========================================================
+def find_duplicates(targets, scans=None, options=None, scope=("IMAGE", "RAW"), extensions=None,
+                    cancel_token=None, progress=None, db_path=None, stats_path=None) -> Iterator[Match]:
+    unknown = set(scope) - set(_FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown scan scope: {', '.join(sorted(unknown))}")
+    for folder in (targets, scans):
+        if folder is not None and not os.path.isdir(folder):
+            raise FileNotFoundError(f"Folder not found: {folder}")
+    extensions = extensions or {}
+    scan_scope = {key: key in scope for key in _FILTER_KEYS}
+    extension_filters = {
+        filter_key: {ext.lower() for ext in extensions.get(key, _DEFAULT_EXTENSIONS[key])}
+        for key, filter_key in _FILTER_KEYS.items()
+    }
+
+    cancel_token = cancel_token or CancelToken()
+    matches = queue.Queue(maxsize=_QUEUE_SIZE)
+
+    # blocks while the caller is behind, until the search is cancelled
+    def put_match(match):
+        while not cancel_token.is_cancelled():
+            try:
+                matches.put(match, timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    engine = ScanEngine(targets, scans, scan_scope, extension_filters, AppConfigs.make_scan_options(options),
+                        on_match=put_match, on_progress=progress, cancel_token=cancel_token,
+                        db_path=db_path or AppConfigs.get_user_fingerprint_db_path(),
+                        stats_path=stats_path, save_stats=stats_path is not None)
+
+    def run():
+        try:
+            engine.run()
+        finally:
+            matches.put(None)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            match = matches.get()
+            if match is None:
+                finished = True
+                break
+            yield match
+    finally:
+        if not finished:
+            # the caller stopped iterating early; the search may wait for room for its end marker
+            cancel_token.cancel()
+            while thread.is_alive():
+                try:
+                    matches.get(timeout=_PUT_TIMEOUT)
+                except queue.Empty:
+                    pass
+        thread.join()
+    if engine.error is not None:
+        raise engine.error
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import hashlib
+import os
+
+from .log_proc import Logger
+
+# =========================================================
+# Byte-identical duplicates, found before any decoding:
+#   1. only files whose size exists on both sides can be identical,
+#   2. then the first and last 64 KB are hashed within those size groups,
+#   3. and only the files still colliding are hashed completely.
+# With a FingerprintStore, both digests are kept and reused while the file's size, mtime and
+# inode are unchanged, so a rescan only reads the files which changed.
+# =========================================================
+class ExactDupProc:
+
+    _PARTIAL_SIZE = 64 * 1024
+    _READ_CHUNK_SIZE = 1024 * 1024
+
+    # store: FingerprintStore keeping the digests, None: always read the files
+    def __init__(self, store=None):
+        self.store = store
+        # bytes read by the partial and full hashes, for the scan statistics
+        self.bytes_read = 0
+
+    # hash of the first and last 64 KB (the whole file when it is small)
+    def partial_hash(self, path, size):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            head = f.read(ExactDupProc._PARTIAL_SIZE)
+            digest.update(head)
+            self.bytes_read += len(head)
+            if size > ExactDupProc._PARTIAL_SIZE:
+                f.seek(max(ExactDupProc._PARTIAL_SIZE, size - ExactDupProc._PARTIAL_SIZE))
+                tail = f.read(ExactDupProc._PARTIAL_SIZE)
+                digest.update(tail)
+                self.bytes_read += len(tail)
+        return digest.hexdigest()
+
+    def full_hash(self, path):
+        digest = hashlib.blake2b(digest_size=32)
+        with open(path, "rb") as f:
+            while chunk := f.read(ExactDupProc._READ_CHUNK_SIZE):
+                digest.update(chunk)
+                self.bytes_read += len(chunk)
+        return digest.hexdigest()
+
+    # The digest "name" of FingerprintStore.DIGEST_NAMES, from the store while the file is unchanged,
+    # else hash_func() (file_stats: {path: FileStat} from the walk, None: no store lookup)
+    def stored_hash(self, path, name, hash_func, file_stats):
+        st = file_stats.get(path) if self.store is not None and file_stats is not None else None
+        if st is None:
+            return hash_func()
+        digest = self.store.get_digest(path, st, name)
+        if digest is None:
+            digest = hash_func()
+            self.store.put_digest(path, st, name, digest)
+        return digest
+
+    # Keep the keys present on both sides: {key: ([target paths], [scan paths])}
+    @staticmethod
+    def _shared_groups(target_keys, scan_keys):
+        groups = {}
+        for path, key in target_keys.items():
+            groups.setdefault(key, ([], []))[0].append(path)
+        for path, key in scan_keys.items():
+            if key in groups:
+                groups[key][1].append(path)
+        return {key: group for key, group in groups.items() if group[1]}
+
+    # Compute "key_func(path)" for every path of the groups, skipping unreadable files
+    def _rekey(self, groups, key_func, is_running):
+        target_keys = {}
+        scan_keys = {}
+        for target_paths, scan_paths in groups.values():
+            for paths, keys in ((target_paths, target_keys), (scan_paths, scan_keys)):
+                for path in paths:
+                    if not is_running():
+                        return {}, {}
+                    try:
+                        keys[path] = key_func(path)
+                    except OSError as e:
+                        Logger.setLog(Logger.LOG_LV_ERROR, f"Error hashing file {path}: {e}")
+        return target_keys, scan_keys
+
+    # target_sizes / scan_sizes: {path: file size}
+    # file_stats: {path: FileStat} of the walk, to reuse the stored digests (see stored_hash)
+    # Returns the byte-identical (target path, scan path) pairs, sorted.
+    def find_exact_duplicates(self, target_sizes, scan_sizes, is_running=lambda: True, file_stats=None):
+        # 1. size buckets (empty files are not duplicates of anything)
+        groups = ExactDupProc._shared_groups(
+            {path: size for path, size in target_sizes.items() if size > 0},
+            {path: size for path, size in scan_sizes.items() if size > 0}
+        )
+
+        # 2. partial hash within the same size groups; the size stays part of the key
+        sizes = {**target_sizes, **scan_sizes}
+        target_keys, scan_keys = self._rekey(
+            groups, lambda path: (sizes[path], self.stored_hash(path, "partial", lambda: self.partial_hash(path, sizes[path]), file_stats)),
+            is_running
+        )
+        groups = ExactDupProc._shared_groups(target_keys, scan_keys)
+
+        # 3. full hash of the survivors (not needed when the partial hash read the whole file)
+        partial_keys = {**target_keys, **scan_keys}
+        groups = ExactDupProc._shared_groups(*self._rekey(
+            groups,
+            lambda path: (self.stored_hash(path, "full", lambda: self.full_hash(path), file_stats)
+                          if sizes[path] > 2 * ExactDupProc._PARTIAL_SIZE else partial_keys[path]),
+            is_running
+        ))
+
+        pairs = []
+        for target_paths, scan_paths in groups.values():
+            for target_path in target_paths:
+                for scan_path in scan_paths:
+                    if os.path.abspath(target_path) != os.path.abspath(scan_path):
+                        pairs.append((target_path, scan_path))
+        return sorted(pairs)
+
+    # Single folder version: sizes is {path: file size}, every file is hashed at most once per stage.
+    # file_stats: as for find_exact_duplicates
+    # Returns the groups (sorted lists of at least two paths) of byte-identical files, sorted.
+    def find_exact_groups(self, sizes, is_running=lambda: True, file_stats=None):
+        # 1. size buckets (empty files are not duplicates of anything)
+        groups = ExactDupProc._split_groups([[path for path, size in sizes.items() if size > 0]], lambda path: sizes[path], is_running)
+
+        # 2. partial hash, 3. full hash (not needed when the partial hash read the whole file)
+        groups = ExactDupProc._split_groups(
+            groups, lambda path: self.stored_hash(path, "partial", lambda: self.partial_hash(path, sizes[path]), file_stats), is_running
+        )
+        groups = ExactDupProc._split_groups(
+            [group for group in groups if sizes[group[0]] > 2 * ExactDupProc._PARTIAL_SIZE],
+            lambda path: self.stored_hash(path, "full", lambda: self.full_hash(path), file_stats), is_running
+        ) + [group for group in groups if sizes[group[0]] <= 2 * ExactDupProc._PARTIAL_SIZE]
+
+        return sorted(sorted(group) for group in groups)
+
+    # Split every group by "key_func(path)", keeping the sub-groups of at least two paths
+    @staticmethod
+    def _split_groups(groups, key_func, is_running):
+        split = []
+        for group in groups:
+            buckets = {}
+            for path in group:
+                if not is_running():
+                    return []
+                try:
+                    buckets.setdefault(key_func(path), []).append(path)
+                except OSError as e:
+                    Logger.setLog(Logger.LOG_LV_ERROR, f"Error hashing file {path}: {e}")
+            split.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+        return split
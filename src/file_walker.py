@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import os
+import queue
+import threading
+from collections import namedtuple
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+
+from .log_proc import Logger
+
+# The part of os.stat_result the scan needs (size for the exact pre-pass, the rest for the fingerprint store)
+FileStat = namedtuple("FileStat", ["st_size", "st_mtime_ns", "st_ino"])
+
+# =========================================================
+# Directory enumeration for the scan:
+#   - subdirectories are listed concurrently by a thread pool (listing is I/O bound,
+#     which matters on slow network mounts),
+#   - the files are yielded as soon as their directory is listed, so the next stage
+#     works while the enumeration is still running,
+#   - include / exclude globs are matched with the path relative to the root (with "/")
+#     or with the name alone; excluded directories are not entered,
+#   - symbolic links are followed, but every directory (device, inode) is entered once
+#     per root, so link loops end,
+#   - with a DirectoryCache, unchanged directories are not listed again (their wanted files
+#     are still stat'ed, a file edited in place does not change its directory).
+# =========================================================
+class FileWalker:
+
+    # How often a stop request is checked while waiting for the listing threads (seconds)
+    _POLL_INTERVAL = 0.2
+
+    def __init__(self, extensions, recursive=True, include_globs=(), exclude_globs=(), thread_count=8, directory_cache=None):
+        if not isinstance(thread_count, int) or thread_count < 1:
+            raise ValueError("FileWalker thread_count must be a positive integer")
+        self.extensions = None if extensions is None else {ext.lower() for ext in extensions}  # None: every file
+        self.recursive = recursive
+        self.include_globs = tuple(include_globs)
+        self.exclude_globs = tuple(exclude_globs)
+        self.thread_count = thread_count
+        self.directory_cache = directory_cache
+
+    @staticmethod
+    def _matches(globs, rel_path, name):
+        return any(fnmatch(rel_path, pattern) or fnmatch(name, pattern) for pattern in globs)
+
+    def _is_wanted_file(self, rel_path, name):
+        if self.extensions is not None and os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        if self.include_globs and not FileWalker._matches(self.include_globs, rel_path, name):
+            return False
+        return not FileWalker._matches(self.exclude_globs, rel_path, name)
+
+    # True if a walk of root would yield path (for single files, e.g. reported by a FolderWatcher)
+    def accepts(self, root, path):
+        try:
+            rel_path = os.path.relpath(path, root)
+        except ValueError:
+            return False    # another drive
+        if rel_path == os.curdir or rel_path.startswith(os.pardir):
+            return False
+        parts = rel_path.split(os.sep)
+        if not self.recursive and len(parts) > 1:
+            return False
+        # no directory on the way may be excluded
+        for depth in range(1, len(parts)):
+            if FileWalker._matches(self.exclude_globs, "/".join(parts[:depth]), parts[depth - 1]):
+                return False
+        return self._is_wanted_file("/".join(parts), parts[-1])
+
+    # Read one directory: returns ([(name, FileStat)] of every file, [subdirectory names]), or None on error
+    @staticmethod
+    def _read_directory(directory):
+        files = []
+        dirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            dirs.append(entry.name)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            files.append((entry.name, FileStat(st.st_size, st.st_mtime_ns, st.st_ino)))
+                    except OSError as e:
+                        # broken link, or the file was removed meanwhile
+                        Logger.setLog(Logger.LOG_LV_ERROR, f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            Logger.setLog(Logger.LOG_LV_ERROR, f"Error scanning directory {directory}: {e}")
+            return None
+        return files, dirs
+
+    # Current FileStat of the file, or None on error
+    @staticmethod
+    def _stat_file(path):
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            Logger.setLog(Logger.LOG_LV_ERROR, f"Error reading {path}: {e}")
+            return None
+        return FileStat(st.st_size, st.st_mtime_ns, st.st_ino)
+
+    # List one directory (dir_stat: its os.stat result):
+    # returns ([(root, path, FileStat)], [(subdirectory, relative subdirectory)])
+    def _list_directory(self, root, directory, rel_dir, dir_stat):
+        listing = self.directory_cache.lookup(directory, dir_stat) if self.directory_cache is not None else None
+        # a stored listing only gives the names, the stats it recorded may be out of date
+        restat = listing is not None
+        if listing is not None:
+            names, dirs = listing.files, listing.dirs
+        else:
+            read = FileWalker._read_directory(directory)
+            if read is None:
+                return [], []
+            names, dirs = read
+            if self.directory_cache is not None:
+                self.directory_cache.record(directory, dir_stat, names, dirs)
+
+        files = []
+        for name, file_stat in names:
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if self._is_wanted_file(rel_path, name):
+                path = os.path.join(directory, name)
+                if restat:
+                    file_stat = FileWalker._stat_file(path)
+                    if file_stat is None:
+                        continue
+                files.append((root, path, file_stat))
+
+        subdirs = []
+        if self.recursive:
+            for name in dirs:
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if not FileWalker._matches(self.exclude_globs, rel_path, name):
+                    subdirs.append((os.path.join(directory, name), rel_path))
+        return files, subdirs
+
+    # Yields (root, path, FileStat) for the wanted files under every root, in no particular order,
+    # until all directories are listed or is_running() returns False.
+    def walk(self, roots, is_running=lambda: True):
+        results = queue.Queue()
+        lock = threading.Lock()
+        visited = set()
+        pending = [0]
+        stopped = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.thread_count)
+
+        # The stat of the directory the first time it is seen from this root, else None
+        # (symbolic links may lead to the same one)
+        def first_visit(root, directory):
+            try:
+                st = os.stat(directory)
+            except OSError as e:
+                Logger.setLog(Logger.LOG_LV_ERROR, f"Error scanning directory {directory}: {e}")
+                return None
+            with lock:
+                if (root, st.st_dev, st.st_ino) in visited:
+                    return None
+                visited.add((root, st.st_dev, st.st_ino))
+                return st
+
+        def submit(root, directory, rel_dir, dir_stat):
+            with lock:
+                pending[0] += 1
+            try:
+                executor.submit(list_tree, root, directory, rel_dir, dir_stat)
+            except RuntimeError:
+                # the walk was stopped meanwhile
+                finish_one()
+
+        def finish_one():
+            with lock:
+                pending[0] -= 1
+                done = pending[0] == 0
+            if done:
+                results.put(None)
+
+        def list_tree(root, directory, rel_dir, dir_stat):
+            try:
+                files, subdirs = self._list_directory(root, directory, rel_dir, dir_stat)
+                results.put(files)
+                for subdir, rel_subdir in subdirs:
+                    if stopped.is_set():
+                        break
+                    subdir_stat = first_visit(root, subdir)
+                    if subdir_stat is not None:
+                        submit(root, subdir, rel_subdir, subdir_stat)
+            finally:
+                finish_one()
+
+        try:
+            with lock:
+                pending[0] += 1     # keeps the walk open until every root is submitted
+            for root in roots:
+                root_stat = first_visit(root, root)
+                if root_stat is not None:
+                    submit(root, root, "", root_stat)
+            finish_one()
+
+            while is_running():
+                try:
+                    files = results.get(timeout=FileWalker._POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if files is None:
+                    return
+                yield from files
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .pic_similar_proc import PicSimilarProc
+from .log_proc import Logger
+
+# PicSimilarProc method computing the fingerprint of each scope
+_FINGERPRINT_METHODS = {
+    "IMAGE": "image_fingerprint",
+    "RAW": "raw_fingerprint",
+    "RAW_PREVIEW": "raw_preview_fingerprint",
+    "VIDEO": "video_fingerprint",
+}
+
+_worker_proc = None
+
+# Initializer of the pool processes: their log records go back to the scanning process
+# (a process printing to stdout would corrupt the results of the command line scanner)
+def _init_worker(min_level):
+    Logger.setMinLevel(min_level)
+    Logger.startCapture()
+
+# Runs in the pool processes (must be a module level function to be picklable)
+# options: keyword arguments of the fingerprint method (e.g. hash_names)
+# Returns (fingerprint or None, reading and decoding seconds, hashing seconds, [(level, message)] logged)
+def _fingerprint_file(kind, path, options):
+    global _worker_proc
+    if _worker_proc is None:
+        _worker_proc = PicSimilarProc()
+    start = time.perf_counter()
+    hash_start = _worker_proc.hash_seconds
+    fingerprint = getattr(_worker_proc, _FINGERPRINT_METHODS[kind])(path, **options)
+    hash_seconds = _worker_proc.hash_seconds - hash_start
+    return fingerprint, time.perf_counter() - start - hash_seconds, hash_seconds, Logger.takeCaptured()
+
+# =========================================================
+# Process pool for the CPU bound decoding and hashing.
+# Only the paths go to the workers and only the compact fingerprints (and the log records) come back.
+# At most a few files per worker are in flight, so a stop request is noticed quickly
+# and the pending files are simply never submitted.
+# The decode and hash times of the workers are summed up for the scan statistics.
+# =========================================================
+class FingerprintPool:
+
+    # How often a stop request is checked while waiting for the workers (seconds)
+    _POLL_INTERVAL = 0.2
+
+    def __init__(self, worker_count=0):
+        if not isinstance(worker_count, int) or worker_count < 0:
+            raise ValueError("FingerprintPool worker_count must be a positive integer, or 0 for the CPU count")
+        self.worker_count = worker_count or os.cpu_count() or 1
+        self._executor = None
+        # summed over all workers since the pool was created
+        self.decode_seconds = 0.0
+        self.hash_seconds = 0.0
+        # files of the running fingerprint_files call: not submitted yet / being fingerprinted
+        self.pending_count = 0
+        self.in_flight_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: forking a process that runs Qt threads is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.worker_count,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(Logger.getMinLevel(),)
+            )
+        return self._executor
+
+    # Yields (path, fingerprint or None) in completion order, until all paths are done
+    # or is_running() returns False.
+    def fingerprint_files(self, kind, paths, is_running=lambda: True, options=None):
+        if kind not in _FINGERPRINT_METHODS:
+            raise ValueError(f"FingerprintPool cannot fingerprint {kind} files")
+        options = options or {}
+        self.pending_count = len(paths)
+
+        # One worker: no need to pay for the processes
+        if self.worker_count == 1:
+            for path in paths:
+                if not is_running():
+                    return
+                self.pending_count -= 1
+                yield path, self._take_result(_fingerprint_file(kind, path, options))
+            return
+
+        executor = self._get_executor()
+        max_in_flight = self.worker_count * 4
+        path_iter = iter(paths)
+        in_flight = {}
+        try:
+            while True:
+                while is_running() and len(in_flight) < max_in_flight:
+                    path = next(path_iter, None)
+                    if path is None:
+                        break
+                    in_flight[executor.submit(_fingerprint_file, kind, path, options)] = path
+                    self.pending_count -= 1
+                self.in_flight_count = len(in_flight)
+
+                if not in_flight or not is_running():
+                    return
+
+                done, _ = wait(in_flight, timeout=FingerprintPool._POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    self.in_flight_count = len(in_flight)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        # the worker logs the decoding errors, a crashed worker gives no fingerprint
+                        yield path, None
+                        continue
+                    yield path, self._take_result(result)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            self.pending_count = 0
+            self.in_flight_count = 0
+
+    # result of _fingerprint_file -> fingerprint, the records logged by the worker are logged here
+    def _take_result(self, result):
+        fingerprint, decode_seconds, hash_seconds, records = result
+        self.decode_seconds += decode_seconds
+        self.hash_seconds += hash_seconds
+        for lv_const, msg_str in records:
+            Logger.setLog(lv_const, msg_str)
+        return fingerprint
+
+    # wait: return once the worker processes have exited
+    def shutdown(self, wait=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
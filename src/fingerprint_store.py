@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import dataclasses
+import json
+import os
+import sqlite3
+import time
+
+from .pic_fingerprint import PicFingerprint
+from .directory_cache import DirectoryListing
+from .metadata_prefilter import ImageHeader
+
+# =========================================================
+# Persistent fingerprint index (SQLite).
+# A stored fingerprint is only reused while the file's size, mtime and inode are unchanged,
+# so a rescan of an unchanged library only needs to stat the files.
+# WAL journal mode lets other processes read while a scan is writing. The changes are kept in memory
+# and written in one short transaction per batch (batch_size rows, or the changes of commit_interval
+# seconds), so another scan writing to the same store only waits for the lock briefly, and an
+# interrupted scan keeps everything hashed before its last batch.
+# The directory listings of the last successful scan are kept too (see DirectoryCache), and the
+# partial and full digests of the exact duplicate pre-pass (see ExactDupProc) and the image
+# headers of the metadata prefilter, checked like the fingerprints.
+# =========================================================
+class FingerprintStore:
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fingerprints (
+            kind     TEXT    NOT NULL,
+            path     TEXT    NOT NULL,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode    INTEGER NOT NULL,
+            version  INTEGER NOT NULL,
+            data     TEXT    NOT NULL,
+            PRIMARY KEY (kind, path)
+        )
+    """
+
+    _DIRECTORY_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS directories (
+            path     TEXT    NOT NULL PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            inode    INTEGER NOT NULL,
+            nlink    INTEGER NOT NULL,
+            data     TEXT    NOT NULL
+        )
+    """
+
+    _DIGEST_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS digests (
+            path     TEXT    NOT NULL PRIMARY KEY,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode    INTEGER NOT NULL,
+            partial  TEXT,
+            full     TEXT
+        )
+    """
+
+    _HEADER_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS headers (
+            path     TEXT    NOT NULL PRIMARY KEY,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode    INTEGER NOT NULL,
+            data     TEXT    NOT NULL
+        )
+    """
+
+    DIGEST_NAMES = ("partial", "full")
+
+    def __init__(self, db_path, batch_size=500, commit_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        # [(sql, parameters)] not written yet, and the time.monotonic() of the first one
+        self._pending = []
+        self._pending_since = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # timeout: wait for the lock instead of failing when another process is writing
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(FingerprintStore._SCHEMA)
+        self._conn.execute(FingerprintStore._DIRECTORY_SCHEMA)
+        self._conn.execute(FingerprintStore._DIGEST_SCHEMA)
+        self._conn.execute(FingerprintStore._HEADER_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Return the stored fingerprint of the file, or None if it is missing or out of date
+    def get(self, kind, path, st: os.stat_result):
+        path = os.path.abspath(path)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, version, data FROM fingerprints WHERE kind = ? AND path = ?",
+            (kind, path)
+        ).fetchone()
+        if row is None:
+            return None
+
+        size, mtime_ns, inode, version, data = row
+        if (size, mtime_ns, inode, version) != (st.st_size, st.st_mtime_ns, st.st_ino, PicFingerprint.VERSION):
+            return None
+        return PicFingerprint.from_dict(json.loads(data))
+
+    # Save (or replace) the fingerprint of the file
+    def put(self, kind, path, st: os.stat_result, fingerprint: PicFingerprint):
+        path = os.path.abspath(path)
+        self._write(
+            "INSERT OR REPLACE INTO fingerprints (kind, path, size, mtime_ns, inode, version, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, path, st.st_size, st.st_mtime_ns, st.st_ino, PicFingerprint.VERSION,
+             json.dumps(fingerprint.to_dict()))
+        )
+
+    def remove(self, kind, path):
+        path = os.path.abspath(path)
+        self._write("DELETE FROM fingerprints WHERE kind = ? AND path = ?", (kind, path))
+
+    # Return the stored digest ("partial" or "full") of the file, or None if it is missing or out of date
+    def get_digest(self, path, st: os.stat_result, name):
+        if name not in FingerprintStore.DIGEST_NAMES:
+            raise ValueError(f"Unknown digest: {name}")
+        path = os.path.abspath(path)
+        row = self._conn.execute(
+            f"SELECT size, mtime_ns, inode, {name} FROM digests WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or tuple(row[:3]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        return row[3]
+
+    # Save one digest of the file; the other one is kept while the file is unchanged
+    # (decided when the batch is written, so the other digest may still be waiting in the same batch)
+    def put_digest(self, path, st: os.stat_result, name, digest):
+        if name not in FingerprintStore.DIGEST_NAMES:
+            raise ValueError(f"Unknown digest: {name}")
+        other = next(other for other in FingerprintStore.DIGEST_NAMES if other != name)
+        self._write(
+            f"INSERT INTO digests (path, size, mtime_ns, inode, {name}) VALUES (?, ?, ?, ?, ?) "
+            f"ON CONFLICT (path) DO UPDATE SET "
+            f"{other} = CASE WHEN (size, mtime_ns, inode) = (excluded.size, excluded.mtime_ns, excluded.inode) "
+            f"THEN {other} END, "
+            f"size = excluded.size, mtime_ns = excluded.mtime_ns, inode = excluded.inode, {name} = excluded.{name}",
+            (os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ino, digest)
+        )
+
+    # Return the stored ImageHeader of the file, or None if it is missing or out of date
+    def get_header(self, path, st: os.stat_result):
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, data FROM headers WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        if row is None or tuple(row[:3]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        # the header carries the path as the caller knows it, like a freshly read one
+        return ImageHeader(**{**json.loads(row[3]), "path": path})
+
+    # Save (or replace) the ImageHeader of the file
+    def put_header(self, path, st: os.stat_result, header: ImageHeader):
+        self._write(
+            "INSERT OR REPLACE INTO headers (path, size, mtime_ns, inode, data) VALUES (?, ?, ?, ?, ?)",
+            (os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ino, json.dumps(dataclasses.asdict(header)))
+        )
+
+    # Stored listings of the roots and of all directories below them: {absolute path: DirectoryListing}
+    def get_directory_listings(self, roots):
+        listings = {}
+        for root in roots:
+            root = os.path.abspath(root)
+            # the children of root sort between root + sep and root + the character after sep
+            prefix = root.rstrip(os.sep) + os.sep
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, inode, nlink, data FROM directories "
+                "WHERE path = ? OR (path >= ? AND path < ?)",
+                (root, prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+            )
+            for path, mtime_ns, inode, nlink, data in rows:
+                listings[path] = DirectoryListing.from_dict(mtime_ns, inode, nlink, json.loads(data))
+        return listings
+
+    # Save the listings of a successful scan and forget the directories it did not find
+    def put_directory_listings(self, listings, stale_paths=()):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO directories (path, mtime_ns, inode, nlink, data) VALUES (?, ?, ?, ?, ?)",
+            ((path, listing.mtime_ns, listing.inode, listing.nlink, json.dumps(listing.to_dict()))
+             for path, listing in listings.items())
+        )
+        self._conn.executemany("DELETE FROM directories WHERE path = ?", ((path,) for path in stale_paths))
+        self.commit()
+
+    # Keep a change for the next batch, and write the batch once it is full or old enough
+    def _write(self, sql, parameters):
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append((sql, parameters))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._pending_since >= self.commit_interval:
+            self.commit()
+
+    # Write the pending changes in one transaction
+    def commit(self):
+        pending, self._pending = self._pending, []
+        for sql, parameters in pending:
+            self._conn.execute(sql, parameters)
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self.commit()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import os
+import threading
+import time
+
+# watchdog (inotify, FSEvents, ReadDirectoryChangesW) is optional: without it the folders are polled
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+from .log_proc import Logger
+from .file_walker import FileWalker
+
+class _WatchdogHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # a directory is "modified" by every file created in it, the files have their own events
+        if event.is_directory and event.event_type not in ("created", "moved", "deleted"):
+            return
+        if event.event_type == "moved":
+            self.watcher.notify_deleted(event.src_path)
+            self.watcher.notify_changed(event.dest_path, event.is_directory)
+        elif event.event_type == "deleted":
+            self.watcher.notify_deleted(event.src_path)
+        elif event.event_type in ("created", "modified", "closed"):
+            self.watcher.notify_changed(event.src_path, event.is_directory)
+
+# =========================================================
+# Collects the file system changes below the roots while a scan is running, and hands them
+# out once they settled:
+#   - a changed file is only handed out after "debounce" seconds without any event, and once
+#     its size and mtime did not change between two checks (files still being copied),
+#   - a changed directory (created, or moved in) is handed out as all the files inside,
+#   - deleted paths (files or directories) are handed out right away.
+# The events come from watchdog when it is installed, else from walking the roots every
+# "poll_interval" seconds and comparing the listings.
+# =========================================================
+class FolderWatcher:
+
+    def __init__(self, roots, recursive=True, debounce=2.0, poll_interval=30.0):
+        self.roots = list(roots)
+        self.recursive = recursive
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = "watchdog" if Observer is not None else "polling"
+
+        self._lock = threading.Lock()
+        self._changed = {}      # {path: (time of the last event, is directory)}
+        self._checked = {}      # {path: (size, mtime_ns)} at the last settle check
+        self._deleted = set()
+        self._observer = None
+        self._poll_thread = None
+        self._stopped = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        if self.backend == "watchdog":
+            self._observer = Observer()
+            handler = _WatchdogHandler(self)
+            for root in self.roots:
+                self._observer.schedule(handler, root, recursive=self.recursive)
+            self._observer.start()
+        else:
+            self._poll_thread = threading.Thread(target=self._poll, daemon=True)
+            self._poll_thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+
+    def notify_changed(self, path, is_directory=False):
+        with self._lock:
+            self._changed[path] = (time.monotonic(), is_directory)
+            self._deleted.discard(path)
+
+    def notify_deleted(self, path):
+        with self._lock:
+            self._deleted.add(path)
+            self._changed.pop(path, None)
+            self._checked.pop(path, None)
+
+    # Returns ([changed files which settled], [deleted files or directories]) since the last call
+    def take_settled(self):
+        now = time.monotonic()
+        settled = []
+        with self._lock:
+            deleted = sorted(self._deleted)
+            self._deleted.clear()
+
+            for path, (last_event, is_directory) in list(self._changed.items()):
+                if now - last_event < self.debounce:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # removed meanwhile, its deletion is reported on its own
+                    del self._changed[path]
+                    self._checked.pop(path, None)
+                    continue
+
+                if not is_directory and self._checked.get(path) != (st.st_size, st.st_mtime_ns):
+                    # still being written: check again after the next quiet period
+                    self._checked[path] = (st.st_size, st.st_mtime_ns)
+                    self._changed[path] = (now, is_directory)
+                    continue
+
+                del self._changed[path]
+                self._checked.pop(path, None)
+                settled.append((path, is_directory))
+
+        changed = []
+        for path, is_directory in settled:
+            if is_directory:
+                # the files moved in with a directory have no events of their own
+                changed.extend(file for _, file, _ in FileWalker(None, self.recursive).walk([path]))
+            else:
+                changed.append(path)
+        return sorted(set(changed)), deleted
+
+    # Polling backend: compare the listings of the roots every poll_interval seconds
+    def _poll(self):
+        walker = FileWalker(None, self.recursive)
+        snapshot = self._snapshot(walker)
+        while not self._stopped.wait(self.poll_interval):
+            current = self._snapshot(walker)
+            for path, file_stat in current.items():
+                if snapshot.get(path) != file_stat:
+                    self.notify_changed(path)
+            for path in snapshot.keys() - current.keys():
+                self.notify_deleted(path)
+            snapshot = current
+
+    def _snapshot(self, walker):
+        try:
+            return {file: file_stat for _, file, file_stat in walker.walk(self.roots, lambda: not self._stopped.is_set())}
+        except Exception as e:
+            Logger.setLog(Logger.LOG_LV_ERROR, f"Error watching folders: {e}")
+            return {}
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+from .pic_fingerprint import PicFingerprint
+
+# =========================================================
+# Multi-index hashing for fixed size (64-bit) perceptual hashes.
+# The hash is split into radius+1 chunks. By the pigeonhole principle two hashes within
+# Hamming distance "radius" share at least one chunk exactly, so a query only has to verify
+# the entries that collide with it in one of the chunk tables instead of every entry.
+# =========================================================
+class HammingIndex:
+
+    def __init__(self, radius, bits=64):
+        if not isinstance(radius, int):
+            raise ValueError("HammingIndex radius must be an integer")
+        self.radius = radius
+        self.bits = bits
+        self._hashes = []
+        self._items = []
+
+        # When there are more chunks than bits the pigeonhole principle does not help,
+        # every entry is a candidate and the tables are not used.
+        self._is_linear = radius >= bits
+        chunk_count = min(max(radius + 1, 1), bits)
+
+        # (shift, mask) of each chunk, sizes differ by one bit at most
+        self._chunks = []
+        shift = 0
+        for i in range(chunk_count):
+            width = bits // chunk_count + (1 if i < bits % chunk_count else 0)
+            self._chunks.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables = [{} for _ in self._chunks]
+
+    # Expected share of the entries a query has to verify, for uniformly distributed hashes
+    def candidate_ratio(self):
+        if self._is_linear:
+            return 1.0
+        return min(1.0, sum(1.0 / (mask + 1) for _, mask in self._chunks))
+
+    def __len__(self):
+        return len(self._hashes)
+
+    # Add a hash; "item" is returned by query() when the hash matches
+    def add(self, hash_value: int, item):
+        entry_id = len(self._hashes)
+        self._hashes.append(hash_value)
+        self._items.append(item)
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((hash_value >> shift) & mask, []).append(entry_id)
+
+    # Return [(item, distance)] of every entry within the radius, in insertion order
+    def query(self, hash_value: int):
+        if self.radius < 0:
+            return []
+
+        if self._is_linear:
+            candidates = range(len(self._hashes))
+        else:
+            candidate_set = set()
+            for table, (shift, mask) in zip(self._tables, self._chunks):
+                bucket = table.get((hash_value >> shift) & mask)
+                if bucket:
+                    candidate_set.update(bucket)
+            candidates = sorted(candidate_set)
+
+        results = []
+        for entry_id in candidates:
+            distance = PicFingerprint.hamming(hash_value, self._hashes[entry_id])
+            if distance <= self.radius:
+                results.append((self._items[entry_id], distance))
+        return results
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import numpy as np
+
+# =========================================================
+# Brute force Hamming matching done in bulk with NumPy.
+# Hashes are packed into uint64 arrays and compared tile by tile
+# (target block x scan block: XOR + popcount), so the memory used by
+# the distance matrix is bounded by max_tile_cells whatever the folder sizes are.
+# =========================================================
+class HammingMatrix:
+
+    # popcount of every byte value, used when numpy has no bitwise_count (numpy < 2.0)
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def __init__(self, radius, max_tile_cells=1 << 22):
+        self.radius = radius
+        self.max_tile_cells = max_tile_cells
+
+    @staticmethod
+    def pack(hashes):
+        return np.fromiter(hashes, dtype=np.uint64)
+
+    @staticmethod
+    def popcount(values):
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(values)
+        values = np.ascontiguousarray(values)
+        return HammingMatrix._POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+    # target_hashes / scan_hashes: uint64 arrays
+    # target_groups / scan_groups: optional int arrays, only pairs in the same group can match (e.g. image mode)
+    # target_owners / scan_owners: optional non-decreasing int arrays of the files the hashes belong to,
+    # when the targets and the scan entries are the same files (a folder matched with itself):
+    # only the entries of earlier files are compared, so each pair of files is computed once and a file
+    # never with itself. The scan tiles after the target tile are skipped, only the tiles on the
+    # diagonal are masked.
+    # Yields (target index, array of scan indices within the radius) for every target, in order.
+    def match(self, target_hashes, scan_hashes, target_groups=None, scan_groups=None, target_owners=None, scan_owners=None):
+        target_count = len(target_hashes)
+        scan_count = len(scan_hashes)
+        if self.radius < 0 or scan_count == 0:
+            for i in range(target_count):
+                yield i, np.empty(0, dtype=np.intp)
+            return
+        triangular = target_owners is not None and scan_owners is not None
+
+        # keep a tile of at most max_tile_cells distances
+        scan_tile = min(scan_count, self.max_tile_cells)
+        target_tile = max(1, self.max_tile_cells // scan_tile)
+
+        for t_start in range(0, target_count, target_tile):
+            t_end = min(t_start + target_tile, target_count)
+            t_block = target_hashes[t_start:t_end, None]
+            rows_found = [[] for _ in range(t_end - t_start)]
+
+            # triangular: only the entries owned by a file before the last target of the tile
+            s_limit = scan_count
+            if triangular:
+                s_limit = int(np.searchsorted(scan_owners, target_owners[t_end - 1], side="left"))
+
+            for s_start in range(0, s_limit, scan_tile):
+                s_end = min(s_start + scan_tile, s_limit)
+                mask = HammingMatrix.popcount(t_block ^ scan_hashes[None, s_start:s_end]) <= self.radius
+                if target_groups is not None and scan_groups is not None:
+                    mask &= target_groups[t_start:t_end, None] == scan_groups[None, s_start:s_end]
+                # diagonal tile: some entries belong to the targets themselves or to later files
+                if triangular and scan_owners[s_end - 1] >= target_owners[t_start]:
+                    mask &= scan_owners[None, s_start:s_end] < target_owners[t_start:t_end, None]
+
+                rows, cols = np.nonzero(mask)
+                for row, col in zip(rows.tolist(), cols.tolist()):
+                    rows_found[row].append(s_start + col)
+
+            for row, found in enumerate(rows_found):
+                yield t_start + row, np.asarray(found, dtype=np.intp)
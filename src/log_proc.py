@@ -2,12 +2,27 @@
 # -*- coding: utf-8 -*-
 # ===============================================================================================
 
+import atexit
 import datetime
 import os
+import queue
 import sys
+import threading
+import time
 from .path_proc import PathProc
 from pathlib import Path
 
+# =========================================================
+# setLog only formats the message, calls the callback and queues the record; a writer thread
+# prints the records and appends them to the daily log file, which it keeps open, in batches.
+# The file is rotated by date (log.log.YYYYMMDD) and by size (log.log.YYYYMMDD.1, .2, ...).
+# When the queue is full, records below WARNING are dropped (and counted) instead of blocking
+# the scan. Records below the minimum level (setMinLevel) are dropped before anything is done
+# with them. flush() waits until every queued record is written; at exit the writer writes
+# everything still queued and closes the file.
+# Printing and the log file are turned on by the applications (setTerminalDisplay, setFileOutput),
+# so a program using the scan modules as a library only gets the records it asks for (setCallback).
+# =========================================================
 class Logger:
     # public const
     LOG_LV_DEBUG     = 100
@@ -33,10 +48,32 @@ class Logger:
     # private default log saving directory path.
     _logDir = ""
     _defaultDatetimeFormat = "%Y-%m-%d %H:%M:%S"
-    _print2Terminal = True      # you can turn off it if you don't want it to display on terminal UI
+    _print2Terminal = False     # turned on by the applications which display the log on the terminal
+    _save2File = False          # turned on by the applications which keep the daily log file
     _rootMarkerName = os.path.basename(sys.argv[0]) # default root marker name is the name of the executing file  resource_path
     _log_file_name = "log"
     _log_callback = None
+    _min_level = LOG_LV_INFO     # records below it are dropped, see setMinLevel
+    _captured = None             # list of (lv_const, msg_str) while capturing, see startCapture
+
+    _QUEUE_SIZE = 100000
+    _BATCH_SIZE = 500
+    _MAX_FILE_SIZE = 10 * 1024 * 1024      # bytes of one log file before it is rotated
+
+    # writer thread state
+    _queue = queue.Queue(maxsize=_QUEUE_SIZE)
+    _writer = None
+    _writer_lock = threading.Lock()
+    _writer_stopped = False
+    _dropped_count = 0
+    # only used by the writer thread (and by setLog once it is stopped)
+    _log_file = None
+    _log_path = None
+    _path_second = None
+    _path_text = ""
+    # the timestamp text is only formatted once per second
+    _stamp_second = None
+    _stamp_text = ""
     
     # to let user to know the class have no constructor
     def __init__(self):
@@ -48,21 +85,149 @@ class Logger:
     
     @staticmethod
     def setLog( lv_const, msg_str ):
+        if lv_const < Logger._min_level:
+            return
+        if Logger._captured is not None:
+            Logger._captured.append((lv_const, msg_str))
+            return
+
         # if there is no root marker file, the function cannot keep going
         if Logger._rootMarkerName == "" or Logger._rootMarkerName is None:
             raise Exception( "You have to set up a project root marker file name first or keep default at the beginning." )
         
         # get current time for log text content to save
-        now_time = datetime.datetime.now()
+        now = time.time()
+        second = int(now)
+        if second != Logger._stamp_second:
+            Logger._stamp_second = second
+            Logger._stamp_text = datetime.datetime.fromtimestamp( second ).strftime( Logger._defaultDatetimeFormat )
         # generate text with time string
-        msg_str = "[" + now_time.strftime( Logger._defaultDatetimeFormat ) + "] (" + Logger.LOG_LV_TEXT[lv_const] + ")" + msg_str
-        
-        if Logger._print2Terminal:
-            print(msg_str)
+        msg_str = "[" + Logger._stamp_text + "] (" + Logger.LOG_LV_TEXT[lv_const] + ")" + msg_str
 
         if Logger._log_callback:
             Logger._log_callback(msg_str)
-    
+        if not Logger._print2Terminal and not Logger._save2File:
+            return
+
+        record = (now, msg_str, Logger._print2Terminal, Logger._save2File)
+        if Logger._writer_stopped:
+            Logger._write_batch([record])
+            return
+        if Logger._writer is None:
+            Logger._start_writer()
+        if lv_const >= Logger.LOG_LV_WARNING:
+            # never lose a warning or an error
+            Logger._queue.put(record)
+            return
+        try:
+            Logger._queue.put_nowait(record)
+        except queue.Full:
+            Logger._dropped_count += 1
+
+    # Wait until every queued record is printed and written
+    @staticmethod
+    def flush():
+        if Logger._writer is not None and Logger._writer.is_alive():
+            Logger._queue.join()
+
+    @staticmethod
+    def _start_writer():
+        with Logger._writer_lock:
+            if Logger._writer is None:
+                Logger._writer = threading.Thread(target=Logger._write_records, name="LogWriter", daemon=True)
+                Logger._writer.start()
+                atexit.register(Logger._stop_writer)
+
+    # At exit: write everything queued and close the file; later records are written directly
+    @staticmethod
+    def _stop_writer():
+        if Logger._writer.is_alive():
+            Logger._queue.put(None)
+            Logger._writer.join()
+        Logger._writer_stopped = True
+        records = []
+        while not Logger._queue.empty():
+            records.append(Logger._queue.get_nowait())
+        Logger._write_batch(records)
+        Logger._close_file()
+
+    # Writer thread: takes the records in batches until the None sent by _stop_writer
+    @staticmethod
+    def _write_records():
+        while True:
+            records = [Logger._queue.get()]
+            try:
+                while len(records) < Logger._BATCH_SIZE:
+                    records.append(Logger._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                Logger._write_batch([record for record in records if record is not None])
+            finally:
+                for _ in records:
+                    Logger._queue.task_done()
+            if None in records:
+                Logger._close_file()
+                return
+
+    # Print and append the records to the log file, which stays open until the date changes or it is full
+    @staticmethod
+    def _write_batch(records):
+        try:
+            if Logger._dropped_count:
+                dropped, Logger._dropped_count = Logger._dropped_count, 0
+                records.append((time.time(), f"({dropped} log records dropped, the log queue was full)",
+                                Logger._print2Terminal, Logger._save2File))
+            if not records:
+                return
+
+            terminal_lines = [msg for _, msg, to_terminal, _ in records if to_terminal]
+            if terminal_lines:
+                print("\n".join(terminal_lines))
+
+            # consecutive records of the same file are written at once
+            lines = []
+            for record_time, msg, _, to_file in records:
+                if not to_file:
+                    continue
+                path = Logger._log_file_path(record_time)
+                if path != Logger._log_path and lines:
+                    Logger._append_lines(lines)
+                    lines = []
+                Logger._log_path = path
+                lines.append(msg)
+            if lines:
+                Logger._append_lines(lines)
+        except Exception as e:
+            # the log must never stop the application
+            print(f"Error writing the log: {e}", file=sys.stderr)
+            Logger._close_file()
+
+    @staticmethod
+    def _append_lines(lines):
+        log_file = Logger._log_file
+        if log_file is not None and (log_file.name != Logger._log_path or log_file.tell() >= Logger._MAX_FILE_SIZE):
+            Logger._close_file()
+            if log_file.name == Logger._log_path:
+                Logger._rotate(Logger._log_path)
+        if Logger._log_file is None:
+            Logger._log_file = open( Logger._log_path, "a", encoding="utf-8" )
+        Logger._log_file.write( "\n".join(lines) + "\n" )
+        Logger._log_file.flush()
+
+    @staticmethod
+    def _close_file():
+        if Logger._log_file is not None:
+            Logger._log_file.close()
+            Logger._log_file = None
+
+    # Daily log file of the record time
+    @staticmethod
+    def _log_file_path(record_time):
+        second = int(record_time)
+        if second == Logger._path_second:
+            return Logger._path_text
         if Logger._logDir == "" or Logger._logDir is None:
             Logger._logDir = os.path.join(PathProc.get_real_base_path(), "log")
             os.makedirs(Logger._logDir, exist_ok=True)
@@ -71,11 +236,17 @@ class Logger:
                 raise Exception( f"Log process cannot find out the project root directory ({Logger._logDir}/{Logger._rootMarkerName}), it needs a marker file to detect to!" )
             Logger._logDir = Logger._logDir + os.sep + Logger._log_file_name + ".log"
             #print( f"Log directory: {Logger._logDir}" )
-        
-        with open( Logger._logDir + "." + now_time.strftime( "%Y%m%d" ), "a", encoding="utf-8" ) as f:
-            f.write( msg_str + "\n" )
-            f.flush()
-            f.close()
+        Logger._path_second = second
+        Logger._path_text = Logger._logDir + "." + datetime.date.fromtimestamp( second ).strftime( "%Y%m%d" )
+        return Logger._path_text
+
+    # Move a full log file to the first free "path.N"
+    @staticmethod
+    def _rotate(path):
+        index = 1
+        while os.path.exists(f"{path}.{index}"):
+            index += 1
+        os.replace(path, f"{path}.{index}")
     
     # You better user the method to set up log dir path, _logDir, value. 
     # It can inhance correctness.
@@ -92,11 +263,59 @@ class Logger:
     
     @staticmethod
     def setTerminalDisplay(flg: bool):
-        if not isinstance( path_str, bool ):
+        if not isinstance( flg, bool ):
             return False
         Logger._print2Terminal = flg
         return True
+
+    @staticmethod
+    def setFileOutput(flg: bool):
+        if not isinstance( flg, bool ):
+            return False
+        Logger._save2File = flg
+        return True
         
+    # lv_const: LOG_LV_* constant
+    @staticmethod
+    def setMinLevel(lv_const: int):
+        if lv_const not in Logger.LOG_LV_TEXT:
+            return False
+        Logger._min_level = lv_const
+        return True
+
+    @staticmethod
+    def getMinLevel():
+        return Logger._min_level
+
+    # Keep the records (unformatted) instead of printing and writing them, until takeCaptured().
+    # Used by the fingerprinting processes: their records are logged again by the scanning process,
+    # which has the terminal setting, the GUI callback and the log file.
+    @staticmethod
+    def startCapture():
+        if Logger._captured is None:
+            Logger._captured = []
+
+    # The records captured since the last call: [(lv_const, msg_str)], [] when not capturing
+    @staticmethod
+    def takeCaptured():
+        if not Logger._captured:
+            return []
+        captured, Logger._captured = Logger._captured, []
+        return captured
+
+    # True if a record of the level would be logged: lets callers skip formatting the message
+    @staticmethod
+    def isLevelEnabled(lv_const: int):
+        return lv_const >= Logger._min_level
+
+    # "DEBUG", "info", ... -> LOG_LV_* constant, or None
+    @staticmethod
+    def levelFromText(level_str: str):
+        for lv_const, text in Logger.LOG_LV_TEXT.items():
+            if text == level_str.strip().upper():
+                return lv_const
+        return None
+
     @staticmethod
     def setLogFileName( file_name: str ):
         if ( not isinstance( file_name, str ) or len( file_name ) == 0 ):
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import bisect
+from dataclasses import dataclass
+
+# EXIF orientations 5-8 are rotated by 90 degrees (width and height are swapped on display)
+_SWAPPED_ORIENTATIONS = {5, 6, 7, 8}
+
+@dataclass
+class ImageHeader:
+    path: str
+    width: int
+    height: int
+    mode: str
+    orientation: int = 1    # EXIF orientation tag, 1 when missing
+    frames: int = 1
+
+    # Aspect ratio as displayed, whatever the rotation is (always >= 1)
+    @property
+    def aspect(self):
+        width, height = (self.height, self.width) if self.orientation in _SWAPPED_ORIENTATIONS else (self.width, self.height)
+        return max(width, height) / max(1, min(width, height))
+
+# =========================================================
+# Header-only blocking rules: pairs which cannot be duplicates are pruned
+# before any pixel is decoded.
+#   mode:   same image mode
+#   frames: same frame count
+#   aspect: aspect ratio within the tolerance, after rotation
+# Files without any possible partner on the other side are not fingerprinted at all.
+# =========================================================
+class MetadataPrefilter:
+
+    RULES = ("mode", "frames", "aspect")
+
+    def __init__(self, rules=RULES, aspect_tolerance=0.1):
+        unknown = set(rules) - set(MetadataPrefilter.RULES)
+        if unknown:
+            raise ValueError(f"Unknown prefilter rules: {', '.join(sorted(unknown))}")
+        # keep the evaluation order of RULES: exact rules first
+        self.rules = tuple(rule for rule in MetadataPrefilter.RULES if rule in rules)
+        self.aspect_tolerance = aspect_tolerance
+        self.pruned_pairs = {rule: 0 for rule in self.rules}
+
+    # Name of the first rule rejecting the pair, or None if the pair is possible
+    def reject_rule(self, header1: ImageHeader, header2: ImageHeader):
+        for rule in self.rules:
+            if rule == "mode" and header1.mode != header2.mode:
+                return rule
+            if rule == "frames" and header1.frames != header2.frames:
+                return rule
+            if rule == "aspect":
+                aspect1, aspect2 = header1.aspect, header2.aspect
+                if max(aspect1, aspect2) / min(aspect1, aspect2) > 1 + self.aspect_tolerance:
+                    return rule
+        return None
+
+    def _group_key(self, header: ImageHeader):
+        return tuple(getattr(header, rule) for rule in self.rules if rule != "aspect")
+
+    # Number of sorted aspects within the tolerance of "aspect"
+    def _count_within(self, sorted_aspects, aspect):
+        low = bisect.bisect_left(sorted_aspects, aspect / (1 + self.aspect_tolerance))
+        high = bisect.bisect_right(sorted_aspects, aspect * (1 + self.aspect_tolerance))
+        return high - low
+
+    # Count the pairs pruned by each rule (without going through the N x M pairs) and
+    # return the target and scan paths which still have a possible partner.
+    def prune(self, target_headers, scan_headers):
+        # 1. exact rules: pairs are only possible inside the same (mode, frames) group
+        target_count, scan_count = len(target_headers), len(scan_headers)
+        remaining_pairs = target_count * scan_count
+        for depth, rule in enumerate(r for r in self.rules if r != "aspect"):
+            key = lambda header: self._group_key(header)[:depth + 1]
+            scan_groups = {}
+            for header in scan_headers:
+                scan_groups[key(header)] = scan_groups.get(key(header), 0) + 1
+            pairs = sum(scan_groups.get(key(header), 0) for header in target_headers)
+            self.pruned_pairs[rule] += remaining_pairs - pairs
+            remaining_pairs = pairs
+
+        groups = {}
+        for side, headers in enumerate((target_headers, scan_headers)):
+            for header in headers:
+                groups.setdefault(self._group_key(header), ([], []))[side].append(header)
+
+        # 2. aspect rule: partners of a file are counted by bisecting the sorted aspects of the other side
+        kept_targets, kept_scans = set(), set()
+        for group_targets, group_scans in groups.values():
+            if not group_targets or not group_scans:
+                continue
+            if "aspect" not in self.rules:
+                kept_targets.update(header.path for header in group_targets)
+                kept_scans.update(header.path for header in group_scans)
+                continue
+
+            scan_aspects = sorted(header.aspect for header in group_scans)
+            target_aspects = sorted(header.aspect for header in group_targets)
+            pairs = 0
+            for header in group_targets:
+                partner_count = self._count_within(scan_aspects, header.aspect)
+                pairs += partner_count
+                if partner_count:
+                    kept_targets.add(header.path)
+            for header in group_scans:
+                if self._count_within(target_aspects, header.aspect):
+                    kept_scans.add(header.path)
+            self.pruned_pairs["aspect"] += len(group_targets) * len(group_scans) - pairs
+
+        return kept_targets, kept_scans
+
+    # Single folder version of prune(): every unordered pair of different files is counted once.
+    # Returns the paths which still have a possible partner.
+    def prune_within(self, headers):
+        # 1. exact rules
+        remaining_pairs = len(headers) * (len(headers) - 1) // 2
+        for depth, rule in enumerate(r for r in self.rules if r != "aspect"):
+            group_counts = {}
+            for header in headers:
+                key = self._group_key(header)[:depth + 1]
+                group_counts[key] = group_counts.get(key, 0) + 1
+            pairs = sum(count * (count - 1) // 2 for count in group_counts.values())
+            self.pruned_pairs[rule] += remaining_pairs - pairs
+            remaining_pairs = pairs
+
+        groups = {}
+        for header in headers:
+            groups.setdefault(self._group_key(header), []).append(header)
+
+        # 2. aspect rule: a file is always within the tolerance of itself, so it is not counted
+        kept = set()
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            if "aspect" not in self.rules:
+                kept.update(header.path for header in group)
+                continue
+
+            aspects = sorted(header.aspect for header in group)
+            partner_total = 0
+            for header in group:
+                partner_count = self._count_within(aspects, header.aspect) - 1
+                partner_total += partner_count
+                if partner_count:
+                    kept.add(header.path)
+            self.pruned_pairs["aspect"] += len(group) * (len(group) - 1) // 2 - partner_total // 2
+
+        return kept
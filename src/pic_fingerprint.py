@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+from dataclasses import dataclass, asdict, fields, field
+
+# =========================================================
+# Everything the match stage needs to know about one file.
+# It is computed once per scan, so no file is decoded twice.
+# =========================================================
+@dataclass
+class PicFingerprint:
+    # Bump it when the way fingerprints are computed changes, so stored fingerprints are recomputed
+    VERSION = 6
+
+    # Each perceptual hash is stored as (image as stored, rotated by 90, 180, 270 degrees, mirrored variants...)
+    ROTATION_VARIANTS = 4
+
+    path: str
+    mode: str | None = None         # PIL image mode (images only)
+    hashes: dict = field(default_factory=dict)  # perceptual hashes by name ("phash", "dhash", ...), see above
+    digest: str | None = None       # digest of the sensor data (raws only)
+    duration: float | None = None   # seconds (videos only)
+    frame_hashes: tuple = ()        # pHash of the sampled keyframes, in time order (videos only)
+
+    # Number of different bits between two 64-bit hashes, same as ImageHash.__sub__
+    @staticmethod
+    def hamming(hash1: int, hash2: int) -> int:
+        return (hash1 ^ hash2).bit_count()
+
+    def has_hashes(self, hash_names):
+        return all(name in self.hashes for name in hash_names)
+
+    # True if the fingerprint was computed with these fingerprint method options
+    # (a stored fingerprint may lack a hash of the cascade, or have another number of video samples)
+    def fits_options(self, options):
+        if not self.has_hashes(options.get("hash_names", ())):
+            return False
+        sample_count = options.get("sample_count")
+        return sample_count is None or len(self.frame_hashes) == sample_count
+
+    # Distance between two matched fingerprints: the smallest distance to the variants of other's hash
+    # for images, the median distance of the keyframes at the same positions for videos,
+    # 0 for identical sensor data (None when the fingerprints cannot be compared)
+    def distance(self, other, hash_name="phash", include_mirrored=False):
+        if self.frame_hashes and len(self.frame_hashes) == len(other.frame_hashes):
+            distances = sorted(PicFingerprint.hamming(hash1, hash2) for hash1, hash2 in zip(self.frame_hashes, other.frame_hashes))
+            return distances[len(distances) // 2]
+        if hash_name in self.hashes and hash_name in other.hashes:
+            hash1 = self.hashes[hash_name][0]
+            return min(PicFingerprint.hamming(hash1, hash2) for hash2 in other.hash_variants(hash_name, include_mirrored))
+        if self.digest is not None and self.digest == other.digest:
+            return 0
+        return None
+
+    # All variants of a hash a scan file can be matched with
+    # (rotation invariant hashes like colorhash only have one)
+    def hash_variants(self, hash_name="phash", include_mirrored=False):
+        variants = self.hashes[hash_name]
+        if include_mirrored:
+            return variants
+        return variants[:PicFingerprint.ROTATION_VARIANTS]
+
+    def to_dict(self):
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(data: dict):
+        known = {f.name for f in fields(PicFingerprint)}
+        data = {k: v for k, v in data.items() if k in known}
+        if "hashes" in data:
+            data["hashes"] = {name: tuple(variants) for name, variants in data["hashes"].items()}
+        if "frame_hashes" in data:
+            data["frame_hashes"] = tuple(data["frame_hashes"])
+        return PicFingerprint(**data)
@@ -2,95 +2,539 @@
 # -*- coding: utf-8 -*-
 # ===============================================================================================
 
-import os
+import io
+import hashlib
+import time
 import imagehash
 from PIL import Image
 import rawpy
 import numpy as np
 
+# PyAV (FFmpeg) is optional: without it the VIDEO scope is skipped
+try:
+    import av
+except ImportError:
+    av = None
+
 from .log_proc import Logger
+from .pic_fingerprint import PicFingerprint
+from .hamming_index import HammingIndex
+from .hamming_matrix import HammingMatrix
+from .file_walker import FileWalker
+from .metadata_prefilter import ImageHeader
 from .settings.pic_constants import PicConst
 
 class PicSimilarProc:
+
+    VIDEO_SUPPORTED = av is not None
+
+    # A vectorized comparison costs about this many times less than verifying one index candidate in Python
+    _NUMPY_SPEEDUP = 50
+
+    # phash works on a 32x32 grayscale image (hash_size 8 * highfreq_factor 4)
+    _HASH_IMAGE_SIZE = 32
+    # The reduced decode keeps at least this many times the hash image size before the final resize
+    _DECODE_OVERSAMPLING = 4
+    _ROTATIONS = (Image.Transpose.ROTATE_90, Image.Transpose.ROTATE_180, Image.Transpose.ROTATE_270)
+    _MIRRORS = (Image.Transpose.FLIP_LEFT_RIGHT, Image.Transpose.FLIP_TOP_BOTTOM,
+                Image.Transpose.TRANSPOSE, Image.Transpose.TRANSVERSE)
+
+    # imagehash function of each name of PicConst.HASH_NAMES
+    _HASH_FUNCTIONS = {
+        "ahash": imagehash.average_hash,
+        "dhash": imagehash.dhash,
+        "phash": imagehash.phash,
+        "whash": imagehash.whash,
+        "colorhash": imagehash.colorhash,   # color histogram: needs colors, rotation invariant
+    }
+
+    _EXIF_ORIENTATION_TAG = 0x0112
+
+    # Keyframes are scaled to this size by the decoder before hashing
+    _VIDEO_FRAME_SIZE = 128
+    # Share of the sampled keyframes which have to be similar for two videos to be similar
+    _VIDEO_MATCH_RATIO = 0.75
+
+    # LibRaw sizes.flip value -> transpose giving the image as the camera was held
+    _RAW_FLIP_TRANSPOSE = {
+        3: Image.Transpose.ROTATE_180,
+        5: Image.Transpose.ROTATE_90,
+        6: Image.Transpose.ROTATE_270,
+    }
     
     def __init__(self):
-        pass
+        # time spent computing the hashes and digests (the rest of a fingerprint is reading and decoding)
+        self.hash_seconds = 0.0
+
+    # get image files depending on extensions, as they are found (see FileWalker)
+    # yields (path, size) tuples, the size comes from the directory entry
+    def iter_source_files(self, directory, extensions = None, recursive = False, include_globs = (), exclude_globs = (),
+                          thread_count = 1, is_running = lambda: True):
+        walker = FileWalker(self._extension_set(extensions), recursive, include_globs, exclude_globs, thread_count)
+        for _, path, file_stat in walker.walk([directory], is_running):
+            yield path, file_stat.st_size
 
-    # get image files depending on extensions
-    def get_source_files(self, directory, extensions = None):
+    # get image files depending on extensions, sorted
+    # with_sizes=True returns (path, size) tuples
+    # walk_options: recursive, include_globs, exclude_globs, thread_count (see iter_source_files)
+    def get_source_files(self, directory, extensions = None, with_sizes = False, **walk_options):
+        files = self.iter_source_files(directory, extensions, **walk_options)
+        return sorted(files if with_sizes else (path for path, _ in files))
+
+    @staticmethod
+    def _extension_set(extensions):
         if extensions is None:
-            extensions = PicConst.IMG_EXTENSIONS
+            return PicConst.IMG_EXTENSIONS
+        if not isinstance(extensions, (set, list, tuple)):
+            raise ValueError("Extensions must be a set, list, or tuple.")
+        return set(extensions) # Convert to set for search
+
+    # read the image header only (no pixel decoding) for the metadata prefilter
+    def read_image_header(self, img_path):
+        try:
+            with Image.open(img_path) as image:
+                return ImageHeader(
+                    img_path, image.width, image.height, image.mode,
+                    orientation=image.getexif().get(PicSimilarProc._EXIF_ORIENTATION_TAG, 1),
+                    frames=getattr(image, "n_frames", 1)
+                )
+        except Exception as e:
+            Logger.setLog( Logger.LOG_LV_ERROR, "Error reading image header: " + str(e) )
+            return None
+
+    # convert an ImageHash to a plain 64-bit integer (cheap to store and compare)
+    @staticmethod
+    def hash_to_int(img_hash):
+        return int(str(img_hash), 16)
+
+    # compute the image fingerprint once, so it can be compared with many other files
+    def image_fingerprint(self, img_path, hash_names=("phash",)):
+        try:
+            with Image.open(img_path) as image:
+                # keep the mode of the file, the reduced decode below may change it
+                fingerprint = PicFingerprint(img_path, mode=image.mode)
+                self.set_perceptual_hashes(fingerprint, image, hash_names)
+            return fingerprint
+        except Exception as e:
+            Logger.setLog( Logger.LOG_LV_ERROR, "Error hashing image: " + str(e) )
+            return None
+
+    # Reduced resolution decode: the hashes only need a 32x32 image.
+    # JPEG is decoded straight to a small image with DCT scaling (draft), other
+    # formats are shrunk with a cheap box reduce before the final LANCZOS resize.
+    def reduce_for_hashing(self, image, mode="L"):
+        size = PicSimilarProc._HASH_IMAGE_SIZE
+        min_size = size * PicSimilarProc._DECODE_OVERSAMPLING
+
+        # draft() only does something for JPEG (and MPO), and must be called before loading
+        image.draft(mode, (min_size, min_size))
+
+        # reduce() does not support palette and bilevel images
+        if image.mode in ("P", "1"):
+            image = image.convert(mode)
+
+        factor_x = max(1, image.width // min_size)
+        factor_y = max(1, image.height // min_size)
+        if factor_x > 1 or factor_y > 1:
+            try:
+                image = image.reduce((factor_x, factor_y))
+            except ValueError:
+                pass # mode without reduce support, the resize below still works
+
+        return image.convert(mode).resize((size, size), Image.Resampling.LANCZOS)
+
+    # The hashes do not have rotation invariance, so the rotated and mirrored variants are hashed too.
+    # They are made from the small image the hashes work on, not from the full resolution image:
+    # downscaling to a square and rotating by 90 degrees commute, so the hashes are the same.
+    # All hashes of the cascade come from the same reduced decode.
+    def set_perceptual_hashes(self, fingerprint, image, hash_names=("phash",)):
+        # colorhash needs the colors, the other hashes the grayscale image
+        if "colorhash" in hash_names:
+            small_color = self.reduce_for_hashing(image, "RGB")
+            small = small_color.convert("L")
         else:
-            if not isinstance(extensions, (set, list, tuple)):
-                raise ValueError("Extensions must be a set, list, or tuple.")
-            extensions = set(extensions) # Convert to set for search
+            small = self.reduce_for_hashing(image)
 
-        files = []
-        # Use os.scandir for better performance (it iterates once and avoids multiple system calls)
+        hash_start = time.perf_counter()
+        variants = [small]
+        variants += [small.transpose(method) for method in PicSimilarProc._ROTATIONS]
+        variants += [small.transpose(method) for method in PicSimilarProc._MIRRORS]
+
+        for name in hash_names:
+            hash_func = PicSimilarProc._HASH_FUNCTIONS[name]
+            if name == "colorhash":
+                fingerprint.hashes[name] = (self.hash_to_int(hash_func(small_color)),)
+            else:
+                fingerprint.hashes[name] = tuple(self.hash_to_int(hash_func(variant)) for variant in variants)
+        self.hash_seconds += time.perf_counter() - hash_start
+
+    # Image to show or hash for a raw without a full demosaic.
+    # Most raws embed a full size or medium JPEG preview which is returned in milliseconds;
+    # without one, fall back to a half size postprocess (no demosaic interpolation, 1/4 of the pixels).
+    @staticmethod
+    def raw_preview_image(raw):
         try:
-            with os.scandir(directory) as entries:
-                for entry in entries:
-                    if entry.is_file():
-                        # Check extension case-insensitively
-                        _, ext = os.path.splitext(entry.name)
-                        if ext.lower() in extensions:
-                            files.append(entry.path)
-        except OSError as e:
-            Logger.setLog(Logger.LOG_LV_ERROR, f"Error {extensions} scanning directory {directory}: {e}")
-            return []
-        # remove all duplicates and sort
-        return sorted(files)
+            thumb = raw.extract_thumb()
+        except (rawpy.LibRawNoThumbnailError, rawpy.LibRawUnsupportedThumbnailError):
+            thumb = None
 
-    # compare images
-    def images_are_similar(self, img1_path, img2_path, cutoff=5):
+        if thumb is not None and thumb.format == rawpy.ThumbFormat.JPEG:
+            image = Image.open(io.BytesIO(thumb.data))
+        elif thumb is not None and thumb.format == rawpy.ThumbFormat.BITMAP:
+            image = Image.fromarray(thumb.data)
+        else:
+            return Image.fromarray(raw.postprocess(half_size=True, use_camera_wb=True, output_bps=8))
+
+        # postprocess applies the camera orientation, the embedded preview does not
+        transpose = PicSimilarProc._RAW_FLIP_TRANSPOSE.get(raw.sizes.flip)
+        if transpose is not None:
+            image = image.transpose(transpose)
+        return image
+
+    # compute the perceptual fingerprint of a raw from its embedded preview (near duplicate detection)
+    def raw_preview_fingerprint(self, raw_path, hash_names=("phash",)):
         try:
-            image1 = Image.open(img1_path)
-            image2 = Image.open(img2_path)
-
-            if image1.mode != image2.mode:
-                return False
-
-            #if image1.size != image2.size:
-            #    return False
-
-            hash1 = imagehash.phash(image1)
-            hash2 = imagehash.phash(image2)
-            
-            # 1. Direct comparison
-            if abs(hash1 - hash2) < cutoff:
-                return True
-                
-            # 2. Try rotating (90, 180, 270 degrees)
-            # phash does not have rotation invariance, so we need to manually rotate and test
-            for angle in [90, 180, 270]:
-                # expand=True ensures that the size is automatically adjusted after rotation
-                rotated_img2 = image2.rotate(angle, expand=True)
-                rotated_hash2 = imagehash.phash(rotated_img2)
-                
-                if abs(hash1 - rotated_hash2) < cutoff:
-                    # Logger.setLog(Logger.LOG_LV_INFO, f"Match found with {angle} degree rotation.")
-                    return True
-                    
-            return False
+            with rawpy.imread(raw_path) as raw:
+                image = self.raw_preview_image(raw)
+                fingerprint = PicFingerprint(raw_path, mode=image.mode)
+                self.set_perceptual_hashes(fingerprint, image, hash_names)
+                return fingerprint
+        except Exception as e:
+            Logger.setLog( Logger.LOG_LV_ERROR, "Error hashing raw preview: " + str(e) )
+            return None
+
+    # compute the raw fingerprint (digest of the sensor data) once
+    def raw_fingerprint(self, raw_path):
+        try:
+            with rawpy.imread(raw_path) as raw:
+                # This keeps an EXACT comparison of the sensor data, but only the digest is kept in memory.
+                hash_start = time.perf_counter()
+                digest = self.sensor_digest(raw.raw_image)
+                self.hash_seconds += time.perf_counter() - hash_start
+                return PicFingerprint(raw_path, digest=digest)
         except Exception as e:
-            Logger.setLog( Logger.LOG_LV_ERROR, "Error comparing images: " + str(e) )
+            Logger.setLog( Logger.LOG_LV_ERROR, "Error hashing raw: " + str(e) )
+            return None
+
+    # Digest of the sensor buffer, read in place through the buffer protocol (no tobytes() copies).
+    # raw_image is a view on LibRaw's buffer, so a worker only holds that one buffer.
+    @staticmethod
+    def sensor_digest(raw_image):
+        digest = hashlib.blake2b(digest_size=32)
+        if raw_image.flags.c_contiguous:
+            digest.update(raw_image)
+        else:
+            # only one row is copied at a time
+            for row in raw_image:
+                digest.update(np.ascontiguousarray(row))
+        return digest.hexdigest()
+
+    # Duration of the video in seconds, or None if the container does not know it
+    @staticmethod
+    def video_duration(container, stream):
+        if container.duration is not None:
+            return container.duration / av.time_base
+        if stream.duration is not None:
+            return float(stream.duration * stream.time_base)
+        return None
+
+    # Fingerprint of a video from a few keyframes, without decoding the whole stream:
+    # seek to "sample_count" evenly spaced positions (relative to the duration, so re-encodes
+    # and resized copies are sampled at the same places) and hash the keyframe found there.
+    # Only one frame is held in memory at a time.
+    def video_fingerprint(self, video_path, sample_count=8):
+        try:
+            with av.open(video_path) as container:
+                stream = container.streams.video[0]
+                # the decoder drops every frame which is not a keyframe
+                stream.codec_context.skip_frame = "NONKEY"
+                duration = self.video_duration(container, stream)
+                if not duration:
+                    raise ValueError("unknown duration")
+
+                frame_hashes = []
+                size = PicSimilarProc._VIDEO_FRAME_SIZE
+                for i in range(sample_count):
+                    position = (i + 0.5) / sample_count * duration
+                    # seeks to the keyframe at or before the position; the timestamps of the stream start at
+                    # start_time, which is not 0 for many MTS / M2TS / MXF files (timecodes)
+                    container.seek((stream.start_time or 0) + int(position / stream.time_base), stream=stream, backward=True, any_frame=False)
+                    frame = next(container.decode(stream), None)
+                    if frame is None:
+                        raise ValueError(f"no keyframe at {position:.1f}s")
+                    small = self.reduce_for_hashing(frame.reformat(width=size, height=size, format="rgb24").to_image())
+                    hash_start = time.perf_counter()
+                    frame_hashes.append(self.hash_to_int(imagehash.phash(small)))
+                    self.hash_seconds += time.perf_counter() - hash_start
+
+                return PicFingerprint(video_path, duration=duration, frame_hashes=tuple(frame_hashes))
+        except Exception as e:
+            Logger.setLog( Logger.LOG_LV_ERROR, "Error hashing video: " + str(e) )
+            return None
+
+    # True if a variant of fp2's hash is within the cutoff of fp1's hash
+    def hash_is_similar(self, fp1, fp2, hash_name, cutoff, match_mirrored=False):
+        hash1 = fp1.hashes[hash_name][0]
+        return any(
+            PicFingerprint.hamming(hash1, hash2) < cutoff
+            for hash2 in fp2.hash_variants(hash_name, match_mirrored)
+        )
+
+    # compare precomputed image fingerprints (fp2 may be rotated, or mirrored if match_mirrored)
+    # cutoffs: {hash name: cutoff}, every hash has to be similar
+    def image_fingerprints_are_similar(self, fp1, fp2, cutoffs=None, match_mirrored=False):
+        if cutoffs is None:
+            cutoffs = {"phash": 5}
+        if fp1.mode != fp2.mode:
             return False
 
+        return all(
+            self.hash_is_similar(fp1, fp2, hash_name, cutoff, match_mirrored)
+            for hash_name, cutoff in cutoffs.items()
+        )
+
+    # compare precomputed raw fingerprints
+    def raw_fingerprints_are_similar(self, fp1, fp2):
+        return fp1.digest == fp2.digest
+
+    # compare precomputed video fingerprints: the durations differ by at most duration_tolerance
+    # (relative), and most keyframes sampled at the same positions are similar
+    def video_fingerprints_are_similar(self, fp1, fp2, cutoff=10, duration_tolerance=0.02):
+        if not fp1.frame_hashes or len(fp1.frame_hashes) != len(fp2.frame_hashes):
+            return False
+        if abs(fp1.duration - fp2.duration) > duration_tolerance * max(fp1.duration, fp2.duration):
+            return False
+
+        similar_count = sum(
+            PicFingerprint.hamming(hash1, hash2) < cutoff
+            for hash1, hash2 in zip(fp1.frame_hashes, fp2.frame_hashes)
+        )
+        return similar_count >= PicSimilarProc._VIDEO_MATCH_RATIO * len(fp1.frame_hashes)
+
+    # Match every target against all scan images with a hash cascade.
+    # cutoffs: ordered {hash name: cutoff}; the first hash generates the candidates through the
+    # Hamming index (or matrix), the following hashes only confirm the surviving candidates.
+    # Yields (target fingerprint, [similar scan fingerprints]) for every target.
+    def match_image_fingerprints(self, target_fps, scan_fps, cutoffs=None, match_mirrored=False):
+        if cutoffs is None:
+            cutoffs = {"phash": 5}
+        stages = list(cutoffs.items())
+        hash_name, cutoff = stages[0]
+
+        # "similar" means distance < cutoff
+        radius = cutoff - 1
+
+        # rotated (and mirrored) hashes point to the same scan file
+        entry_hashes = []
+        entry_owners = []
+        for scan_id, fp2 in enumerate(scan_fps):
+            for scan_hash in fp2.hash_variants(hash_name, match_mirrored):
+                entry_hashes.append(scan_hash)
+                entry_owners.append(scan_id)
+
+        # The index only pays off when a query has to verify a small share of the entries,
+        # which needs a small radius; otherwise compare everything in bulk with numpy.
+        index = HammingIndex(radius=radius)
+        if index.candidate_ratio() * PicSimilarProc._NUMPY_SPEEDUP < 1.0:
+            candidates = self._match_with_index(index, hash_name, target_fps, scan_fps, entry_hashes, entry_owners)
+        else:
+            candidates = self._match_with_matrix(HammingMatrix(radius), hash_name, target_fps, scan_fps, entry_hashes, entry_owners)
+
+        for fp1, matched_fps in candidates:
+            yield fp1, [
+                fp2 for fp2 in matched_fps
+                if all(self.hash_is_similar(fp1, fp2, name, stage_cutoff, match_mirrored) for name, stage_cutoff in stages[1:])
+            ]
+
+    def _match_with_index(self, index, hash_name, target_fps, scan_fps, entry_hashes, entry_owners):
+        for entry_hash, scan_id in zip(entry_hashes, entry_owners):
+            index.add(entry_hash, scan_id)
+
+        for fp1 in target_fps:
+            scan_ids = {scan_id for scan_id, _ in index.query(fp1.hashes[hash_name][0]) if scan_fps[scan_id].mode == fp1.mode}
+            yield fp1, [scan_fps[scan_id] for scan_id in sorted(scan_ids)]
+
+    # triangular: target_fps and scan_fps are the same list, only the earlier scan files are matched
+    def _match_with_matrix(self, matrix, hash_name, target_fps, scan_fps, entry_hashes, entry_owners, triangular=False):
+        # image modes are compared as small integers inside the tiles
+        mode_ids = {}
+        target_modes = np.array([mode_ids.setdefault(fp1.mode, len(mode_ids)) for fp1 in target_fps], dtype=np.int32)
+        entry_modes = np.array([mode_ids.setdefault(scan_fps[scan_id].mode, len(mode_ids)) for scan_id in entry_owners], dtype=np.int32)
+        owners = np.asarray(entry_owners, dtype=np.intp)
+
+        target_hashes = HammingMatrix.pack(fp1.hashes[hash_name][0] for fp1 in target_fps)
+        scan_hashes = HammingMatrix.pack(entry_hashes)
+        target_owners = np.arange(len(target_fps), dtype=np.intp) if triangular else None
+        scan_owners = owners if triangular else None
+        for target_id, entry_ids in matrix.match(target_hashes, scan_hashes, target_modes, entry_modes, target_owners, scan_owners):
+            scan_ids = np.unique(owners[entry_ids])
+            yield target_fps[target_id], [scan_fps[scan_id] for scan_id in scan_ids.tolist()]
+
+    # Single folder version of match_image_fingerprints: every unordered pair is checked at most once
+    # and a file is never matched with itself. Yields the similar (fingerprint, fingerprint) pairs.
+    def match_image_fingerprints_within(self, fps, cutoffs=None, match_mirrored=False):
+        if cutoffs is None:
+            cutoffs = {"phash": 5}
+        stages = list(cutoffs.items())
+        hash_name, cutoff = stages[0]
+        radius = cutoff - 1
+
+        index = HammingIndex(radius=radius)
+        if index.candidate_ratio() * PicSimilarProc._NUMPY_SPEEDUP < 1.0:
+            candidates = self._match_within_with_index(index, hash_name, fps, match_mirrored)
+        else:
+            candidates = self._match_within_with_matrix(HammingMatrix(radius), hash_name, fps, match_mirrored)
+
+        for fp1, fp2 in candidates:
+            if all(self.hash_is_similar(fp1, fp2, name, stage_cutoff, match_mirrored) for name, stage_cutoff in stages[1:]):
+                yield fp1, fp2
+
+    # Each file is only queried against the files indexed before it, then added to the index
+    def _match_within_with_index(self, index, hash_name, fps, match_mirrored):
+        for file_id, fp1 in enumerate(fps):
+            earlier_ids = {earlier_id for earlier_id, _ in index.query(fp1.hashes[hash_name][0]) if fps[earlier_id].mode == fp1.mode}
+            for earlier_id in sorted(earlier_ids):
+                yield fps[earlier_id], fp1
+            for file_hash in fp1.hash_variants(hash_name, match_mirrored):
+                index.add(file_hash, file_id)
+
+    def _match_within_with_matrix(self, matrix, hash_name, fps, match_mirrored):
+        entry_hashes = []
+        entry_owners = []
+        for file_id, fp in enumerate(fps):
+            for file_hash in fp.hash_variants(hash_name, match_mirrored):
+                entry_hashes.append(file_hash)
+                entry_owners.append(file_id)
+
+        # only the earlier files are compared, so each pair is computed and yielded once
+        for fp1, matched_fps in self._match_with_matrix(matrix, hash_name, fps, fps, entry_hashes, entry_owners, triangular=True):
+            for fp2 in matched_fps:
+                yield fp2, fp1
+
+    # Match every target video against all scan videos.
+    # Every keyframe hash is an entry of the Hamming index (or matrix), and a keyframe is only
+    # compared with the keyframes sampled at the same position: any similar keyframe makes a
+    # candidate, which is then confirmed with video_fingerprints_are_similar.
+    # Yields (target fingerprint, [similar scan fingerprints]) for every target.
+    def match_video_fingerprints(self, target_fps, scan_fps, cutoff=10, duration_tolerance=0.02):
+        radius = cutoff - 1
+        index = HammingIndex(radius=radius)
+        if index.candidate_ratio() * PicSimilarProc._NUMPY_SPEEDUP < 1.0:
+            candidates = self._match_videos_with_index(index, target_fps, scan_fps)
+        else:
+            candidates = self._match_videos_with_matrix(HammingMatrix(radius), target_fps, scan_fps)
+
+        for fp1, matched_fps in candidates:
+            yield fp1, [fp2 for fp2 in matched_fps if self.video_fingerprints_are_similar(fp1, fp2, cutoff, duration_tolerance)]
+
+    def _match_videos_with_index(self, index, target_fps, scan_fps):
+        for scan_id, fp2 in enumerate(scan_fps):
+            for position, frame_hash in enumerate(fp2.frame_hashes):
+                index.add(frame_hash, (scan_id, position))
+
+        for fp1 in target_fps:
+            scan_ids = {
+                scan_id
+                for position, frame_hash in enumerate(fp1.frame_hashes)
+                for (scan_id, scan_position), _ in index.query(frame_hash)
+                if scan_position == position
+            }
+            yield fp1, [scan_fps[scan_id] for scan_id in sorted(scan_ids)]
+
+    # The keyframe positions are the groups of the matrix, so only the same positions are compared
+    @staticmethod
+    def _video_entries(fps):
+        owners = [video_id for video_id, fp in enumerate(fps) for _ in fp.frame_hashes]
+        positions = np.fromiter((position for fp in fps for position in range(len(fp.frame_hashes))), dtype=np.int32)
+        hashes = HammingMatrix.pack(frame_hash for fp in fps for frame_hash in fp.frame_hashes)
+        return owners, positions, hashes
+
+    # triangular: target_fps and scan_fps are the same list, only the earlier scan videos are matched
+    def _match_videos_with_matrix(self, matrix, target_fps, scan_fps, triangular=False):
+        target_owners, target_positions, target_hashes = self._video_entries(target_fps)
+        scan_owners, scan_positions, scan_hashes = self._video_entries(scan_fps)
+        scan_owners = np.asarray(scan_owners, dtype=np.intp)
+
+        found = [set() for _ in target_fps]
+        owner_args = (np.asarray(target_owners, dtype=np.intp), scan_owners) if triangular else (None, None)
+        for entry_id, scan_entry_ids in matrix.match(target_hashes, scan_hashes, target_positions, scan_positions, *owner_args):
+            found[target_owners[entry_id]].update(scan_owners[scan_entry_ids].tolist())
+        for fp1, scan_ids in zip(target_fps, found):
+            yield fp1, [scan_fps[scan_id] for scan_id in sorted(scan_ids)]
+
+    # Single folder version of match_video_fingerprints: yields the similar (earlier, later) pairs
+    def match_video_fingerprints_within(self, fps, cutoff=10, duration_tolerance=0.02):
+        radius = cutoff - 1
+        index = HammingIndex(radius=radius)
+        if index.candidate_ratio() * PicSimilarProc._NUMPY_SPEEDUP < 1.0:
+            candidates = self._match_videos_within_with_index(index, fps)
+        else:
+            candidates = self._match_videos_within_with_matrix(HammingMatrix(radius), fps)
+
+        for fp1, fp2 in candidates:
+            if self.video_fingerprints_are_similar(fp1, fp2, cutoff, duration_tolerance):
+                yield fp1, fp2
+
+    # Each video is only queried against the videos indexed before it, then added to the index
+    def _match_videos_within_with_index(self, index, fps):
+        for file_id, fp1 in enumerate(fps):
+            earlier_ids = {
+                earlier_id
+                for position, frame_hash in enumerate(fp1.frame_hashes)
+                for (earlier_id, earlier_position), _ in index.query(frame_hash)
+                if earlier_position == position
+            }
+            for earlier_id in sorted(earlier_ids):
+                yield fps[earlier_id], fp1
+            for position, frame_hash in enumerate(fp1.frame_hashes):
+                index.add(frame_hash, (file_id, position))
+
+    def _match_videos_within_with_matrix(self, matrix, fps):
+        for fp1, matched_fps in self._match_videos_with_matrix(matrix, fps, fps, triangular=True):
+            for fp2 in matched_fps:
+                yield fp2, fp1
+
+    # Exact duplicates share the digest, so they are found by a dictionary lookup.
+    # Yields (target fingerprint, [identical scan fingerprints]) for every target.
+    def match_raw_fingerprints(self, target_fps, scan_fps):
+        scan_by_digest = {}
+        for fp2 in scan_fps:
+            scan_by_digest.setdefault(fp2.digest, []).append(fp2)
+
+        for fp1 in target_fps:
+            yield fp1, scan_by_digest.get(fp1.digest, [])
+
+    # Single folder version of match_raw_fingerprints: yields (first fingerprint, other fingerprint)
+    # for every other file with the same digest, which is enough to group them.
+    def match_raw_fingerprints_within(self, fps):
+        by_digest = {}
+        for fp in fps:
+            by_digest.setdefault(fp.digest, []).append(fp)
+
+        for same_fps in by_digest.values():
+            for fp2 in same_fps[1:]:
+                yield same_fps[0], fp2
+
+    # compare images
+    def images_are_similar(self, img1_path, img2_path, cutoff=5, match_mirrored=False):
+        fp1 = self.image_fingerprint(img1_path)
+        fp2 = self.image_fingerprint(img2_path)
+        if fp1 is None or fp2 is None:
+            return False
+        return self.image_fingerprints_are_similar(fp1, fp2, {"phash": cutoff}, match_mirrored)
+
+    # compare videos by their sampled keyframes
+    def videos_are_similar(self, video1_path, video2_path, cutoff=10, duration_tolerance=0.02):
+        fp1 = self.video_fingerprint(video1_path)
+        fp2 = self.video_fingerprint(video2_path)
+        if fp1 is None or fp2 is None:
+            return False
+        return self.video_fingerprints_are_similar(fp1, fp2, cutoff, duration_tolerance)
+
     # compare raws' sensor data
     def raws_are_similar(self, raw1_path, raw2_path):
-        try:
-            with rawpy.imread(raw1_path) as raw1:
-                with rawpy.imread(raw2_path) as raw2:
-                    # RawPy object does not have .mode attribute. 
-                    # We can compare raw_pattern or color_desc if needed, but raw_image comparison implies structure match.
-                    
-                    # convert raw sensor data to bytes
-                    # This performs an EXACT comparison of the sensor data.
-                    raw1_bytes = np.array(raw1.raw_image).tobytes()
-                    raw2_bytes = np.array(raw2.raw_image).tobytes()
-
-                    # compare bytes
-                    return raw1_bytes == raw2_bytes
-        except Exception as e:
-            Logger.setLog( Logger.LOG_LV_ERROR, "Error comparing raws: " + str(e) )
-            return False
\ No newline at end of file
+        fp1 = self.raw_fingerprint(raw1_path)
+        fp2 = self.raw_fingerprint(raw2_path)
+        if fp1 is None or fp2 is None:
+            return False
+        return self.raw_fingerprints_are_similar(fp1, fp2)
@@ -27,6 +27,20 @@ class PicDupToolbar(QToolBar):
         self.stop_action.setEnabled(False) # Initially disabled
         self.addAction(self.stop_action)
 
+        self.addSeparator()
+
+        # Within Folder Action: find the duplicates within the target folder (no scan folder)
+        self.within_folder_action = QAction(self)
+        self.within_folder_action.setText(AppText.BUTTON_WITHIN_FOLDER)
+        self.within_folder_action.setCheckable(True)
+        self.addAction(self.within_folder_action)
+
+        # Watch Action: after the scan, keep matching the files which change until the scan is stopped
+        self.watch_action = QAction(self)
+        self.watch_action.setText(AppText.BUTTON_WATCH_FOLDERS)
+        self.watch_action.setCheckable(True)
+        self.addAction(self.watch_action)
+
     # Creates a QIcon from a standard pixmap, tinted with the specified color.
     # Attempts to follow the OS style by using the standard mask.
     def create_colored_icon(self, standard_pixmap, color_str):
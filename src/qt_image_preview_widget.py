@@ -4,8 +4,6 @@
 import os
 import subprocess
 from typing import override
-import send2trash
-import rawpy
 
 from PyQt6.QtWidgets import QFrame, QToolButton, QMenu, QMessageBox
 from PyQt6.QtCore import pyqtSignal, Qt, QUrl, QEvent
@@ -13,7 +11,8 @@ from PyQt6.QtGui import QPainter, QColor, QImage, QPixmap, QImageReader, QDeskto
 
 from .settings.gui_text import MenuText, MsgBoxText, ErrorText
 from .settings.pic_constants import PicConst
-from .qt_exif_compare_widget import ExifCompareWidget
+# rawpy, send2trash, PicSimilarProc (PIL, imagehash, numpy) and the EXIF widget (exifread) are imported
+# on first use, so they do not slow down the start of the application
 
 class ImagePreviewWidget(QFrame):
     file_deleted_signal = pyqtSignal(str)
@@ -63,11 +62,8 @@ class ImagePreviewWidget(QFrame):
         self.action_exif.triggered.connect(self.show_exif)
         self.action_exif.setCheckable(True)
         
-        # Exif Widget
-        self.exif_widget = ExifCompareWidget(self)
-        self.exif_widget.hide()
-        self.exif_widget.close_signal.connect(self.hide_exif)
-        self.exif_widget.installEventFilter(self) # Install filter to catch resize events on header
+        # Exif Widget, built the first time it is shown (see create_exif_widget)
+        self.exif_widget = None
         self.thumb_path = None
         
         # Exif Resizing State
@@ -89,7 +85,7 @@ class ImagePreviewWidget(QFrame):
         self.more_btn.raise_()
         
         # Resize Exif Widget
-        if self.exif_widget.isVisible():
+        if self.is_exif_visible():
             exif_h = self._exif_height
             # Ensure height is within reasonable bounds
             exif_h = max(100, min(self.height() - 100, exif_h))
@@ -132,7 +128,7 @@ class ImagePreviewWidget(QFrame):
 
     @override
     def mousePressEvent(self, event):
-        if self.exif_widget.isVisible() and event.button() == Qt.MouseButton.LeftButton:
+        if self.is_exif_visible() and event.button() == Qt.MouseButton.LeftButton:
             exif_top = self.height() - self._exif_height
             if exif_top - 5 <= event.pos().y() <= exif_top:
                 self._is_resizing_exif = True
@@ -151,7 +147,7 @@ class ImagePreviewWidget(QFrame):
 
     @override
     def mouseMoveEvent(self, event):
-        if self.exif_widget.isVisible():
+        if self.is_exif_visible():
             exif_top = self.height() - self._exif_height
             
             # Check for hover to change cursor
@@ -173,14 +169,29 @@ class ImagePreviewWidget(QFrame):
 
         super().mouseMoveEvent(event)
 
-    def hide_exif(self):
+    def is_exif_visible(self):
+        return self.exif_widget is not None and self.exif_widget.isVisible()
+
+    def create_exif_widget(self):
+        from .qt_exif_compare_widget import ExifCompareWidget
+
+        self.exif_widget = ExifCompareWidget(self)
         self.exif_widget.hide()
+        self.exif_widget.close_signal.connect(self.hide_exif)
+        self.exif_widget.installEventFilter(self) # Install filter to catch resize events on header
+
+    def hide_exif(self):
+        if self.exif_widget is not None:
+            self.exif_widget.hide()
         self.action_exif.setChecked(False)
         self.update()
 
     def show_exif(self):
         is_checked = self.action_exif.isChecked()
-        self.exif_widget.setVisible(is_checked)
+        if is_checked and self.exif_widget is None:
+            self.create_exif_widget()
+        if self.exif_widget is not None:
+            self.exif_widget.setVisible(is_checked)
         
         if is_checked:
             # Re-position and load content
@@ -215,6 +226,7 @@ class ImagePreviewWidget(QFrame):
             if reply == QMessageBox.StandardButton.Yes:
                 file_path_to_delete = self.current_file_path
                 try:
+                    import send2trash
                     send2trash.send2trash(file_path_to_delete)
                     self.main_pixmap = None
                     self.thumb_pixmap = None
@@ -237,12 +249,16 @@ class ImagePreviewWidget(QFrame):
             lower_path = path.lower()
             # Simple check for common RAW formats
             if lower_path.endswith(tuple(PicConst.RAW_EXTENSIONS)):
+                import rawpy
+                from .pic_similar_proc import PicSimilarProc
+
                 with rawpy.imread(path) as raw:
-                    # Postprocess to get an RGB image
-                    rgb = raw.postprocess(use_camera_wb=True, no_auto_bright=True, output_bps=8)
-                    height, width, channel = rgb.shape
+                    # Embedded preview (or half size postprocess) instead of a full demosaic
+                    rgb = PicSimilarProc.raw_preview_image(raw).convert("RGB")
+                    width, height = rgb.size
                     bytesPerLine = 3 * width
-                    qImg = QImage(rgb.data, width, height, bytesPerLine, QImage.Format.Format_RGB888)
+                    # copy() detaches the QImage from the PIL buffer
+                    qImg = QImage(rgb.tobytes(), width, height, bytesPerLine, QImage.Format.Format_RGB888).copy()
                     return QPixmap.fromImage(qImg)
             else:
                 # Use QImageReader to respect EXIF orientation (setAutoTransform)
@@ -283,7 +299,7 @@ class ImagePreviewWidget(QFrame):
         self.action_delete.setVisible(not is_parent)
             
         # Update exif if visible
-        if self.exif_widget.isVisible():
+        if self.is_exif_visible():
             self.exif_widget.load_exif(main_path, thumb_path)
 
         self.update() # Trigger repaint
@@ -299,7 +315,7 @@ class ImagePreviewWidget(QFrame):
             
             # Adjust drawing area if exif is open
             draw_h = self.height()
-            if self.exif_widget.isVisible():
+            if self.is_exif_visible():
                 draw_h -= self.exif_widget.height()
                 
             scaled_main = self.main_pixmap.scaled(self.width(), draw_h, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
@@ -318,7 +334,7 @@ class ImagePreviewWidget(QFrame):
             
             # Adjust thumb position if exif is open
             bottom_offset = 0
-            if self.exif_widget.isVisible():
+            if self.is_exif_visible():
                 bottom_offset = self.exif_widget.height()
 
             thumb_x = self.width() - scaled_thumb.width() - margin
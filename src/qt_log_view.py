@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+from collections import deque
+from typing import override
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QPlainTextEdit
+
+# =========================================================
+# Log pane of the main window, cheap at thousands of messages per second:
+#   - plain text, no rich text layout,
+#   - only the last MAX_LINES lines are kept,
+#   - the messages are collected and appended together every FLUSH_INTERVAL_MS,
+#   - it only follows the new messages while it is scrolled to the bottom, so the user
+#     can scroll up and read while the scan goes on.
+# =========================================================
+class QtLogView(QPlainTextEdit):
+
+    MAX_LINES = 5000
+    FLUSH_INTERVAL_MS = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(QtLogView.MAX_LINES)
+
+        # messages waiting for the next flush (older ones would be cut off by the block count anyway)
+        self._pending = deque(maxlen=QtLogView.MAX_LINES)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(QtLogView.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append_message(self, message):
+        self._pending.append(message)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    # Append the pending messages at once
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        text = "\n".join(self._pending)
+        self._pending.clear()
+
+        scroll_bar = self.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        self.appendPlainText(text)
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    @override
+    def clear(self):
+        self._flush_timer.stop()
+        self._pending.clear()
+        super().clear()
@@ -5,11 +5,10 @@
 import os
 import subprocess
 from typing import override
-import send2trash
 
 # PyQt6 modules
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, 
-                             QPushButton, QTextEdit, QFileDialog, QMessageBox, QMainWindow,
+                             QPushButton, QFileDialog, QMessageBox, QMainWindow,
                              QTreeWidget, QTreeWidgetItem, QSplitter, QMenu, QStyleFactory,
                              QStyle, QStyleOptionViewItem, QStatusBar)
 from PyQt6.QtCore import Qt, QUrl, QPoint, QEvent
@@ -21,9 +20,11 @@ from .settings.gui_text import MenuText, MsgBoxText, AppText, LogText
 
 # custom modules -- Qt GUI
 from .qt_scanworker import QtScanWorker
+from .scan_stats import ScanStats
 from .qt_app_menu_bar import PicDupMenu
 from .qt_app_toolbar import PicDupToolbar
 from .qt_image_preview_widget import ImagePreviewWidget
+from .qt_log_view import QtLogView
 
 class PicDupScanGUI(QMainWindow):
     def __init__(self):
@@ -81,9 +82,8 @@ class PicDupScanGUI(QMainWindow):
         # Splitter for Log, Tree View, and Preview
         splitter = QSplitter(Qt.Orientation.Horizontal)
         
-        # Log Display
-        self.log_display = QTextEdit()
-        self.log_display.setReadOnly(True)
+        # Log Display (bounded, appended in batches)
+        self.log_display = QtLogView()
         splitter.addWidget(self.log_display)
         
         # Tree View for Duplicates container
@@ -144,6 +144,7 @@ class PicDupScanGUI(QMainWindow):
         self.addToolBar(Qt.ToolBarArea.TopToolBarArea, self.toolbar)
         self.toolbar.start_action.triggered.connect(self.start_scan)
         self.toolbar.stop_action.triggered.connect(self.stop_scan)
+        self.toolbar.within_folder_action.toggled.connect(self.set_within_folder)
 
         # Status Bar
         self.status_bar = QStatusBar()
@@ -166,11 +167,13 @@ class PicDupScanGUI(QMainWindow):
         if folder:
             self.scan_folder_input.setText(folder)
 
+    # Within one folder: the scan folder is not used
+    def set_within_folder(self, checked):
+        self.scan_folder_input.setEnabled(not checked)
+        self.browse_scan_btn.setEnabled(not checked)
+
     def append_log(self, message):
-        self.log_display.append(message)
-        # Scroll to bottom
-        sb = self.log_display.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        self.log_display.append_message(message)
 
     def elide_path(self, path, max_len=60):
         if len(path) <= max_len:
@@ -208,6 +211,22 @@ class PicDupScanGUI(QMainWindow):
 
         parent_item.setExpanded(True)
 
+    # One parent item per group: the first file is kept as the "Source", the others are its duplicates.
+    # A group which grows (watch mode) keeps its parent item.
+    def add_duplicate_group_to_tree(self, files):
+        abs_files = [os.path.abspath(file) for file in files]
+        source = abs_files[0]
+        root = self.tree_widget
+        for i in range(root.topLevelItemCount()):
+            parent_path = root.topLevelItem(i).data(0, Qt.ItemDataRole.UserRole)
+            if parent_path in abs_files:
+                source = parent_path
+                break
+
+        for file in abs_files:
+            if file != source:
+                self.add_duplicate_to_tree(source, file)
+
     def select_all_duplicates(self):
         root = self.tree_widget
         for i in range(root.topLevelItemCount()):
@@ -264,6 +283,7 @@ class PicDupScanGUI(QMainWindow):
             for path in paths:
                 if path and os.path.exists(path):
                     try:
+                        import send2trash
                         send2trash.send2trash(path)
                         self.handle_preview_delete(path)
                         success_count += 1
@@ -361,6 +381,7 @@ class PicDupScanGUI(QMainWindow):
             )
             # delete file if user confirm
             if reply == QMessageBox.StandardButton.Yes:
+                import send2trash
                 send2trash.send2trash(file_path)
                 self.handle_preview_delete(file_path)
         else:
@@ -403,31 +424,62 @@ class PicDupScanGUI(QMainWindow):
     def start_scan(self):
         target_folder = self.target_folder_input.text()
         scan_folder = self.scan_folder_input.text()
-        if not scan_folder or not os.path.exists(scan_folder):
+        within_folder = self.toolbar.within_folder_action.isChecked()
+        if not within_folder and (not scan_folder or not os.path.exists(scan_folder)):
             QMessageBox.warning(self, MsgBoxText.TITLE_ERROR, MsgBoxText.MSG_FOLDER_NOT_FOUND)
             return
         if not target_folder or not os.path.exists(target_folder):
             QMessageBox.warning(self, MsgBoxText.TITLE_ERROR, MsgBoxText.MSG_FOLDER_NOT_FOUND)
             return
 
+        # The same folder on both sides would compare every pair twice and every file with itself
+        if within_folder or os.path.realpath(target_folder) == os.path.realpath(scan_folder):
+            scan_folder = None
+
         self.toolbar.start_action.setEnabled(False)
         self.toolbar.stop_action.setEnabled(True)
+        self.toolbar.within_folder_action.setEnabled(False)
+        self.toolbar.watch_action.setEnabled(False)
         self.browse_target_btn.setEnabled(False)
         self.browse_scan_btn.setEnabled(False)
         self.log_display.clear()
         self.tree_widget.clear()
         self.preview_widget.load_images(None, None) # Clear preview
 
-        self.worker = QtScanWorker(self, target_folder, scan_folder)
+        self.worker = QtScanWorker(self, target_folder, scan_folder, watch=self.toolbar.watch_action.isChecked())
         # Connect log signal to append_log slot
         self.worker.log_signal.connect(self.append_log)
         # Connect duplicate found signal to add_duplicate_to_tree slot
         self.worker.duplicate_found_signal.connect(self.add_duplicate_to_tree)
+        self.worker.duplicate_group_found_signal.connect(self.add_duplicate_group_to_tree)
+        # Connect file removed signal (watch mode) to the same cleanup as a deletion from the GUI
+        self.worker.file_removed_signal.connect(self.handle_preview_delete)
+        # Connect stats signal to status bar (throughput and ETA); without live statistics
+        # (STATS_INTERVAL 0) the status bar shows the progress signal instead
+        self.worker.stats_signal.connect(self.show_scan_stats)
+        if self.worker.is_config_valid and self.worker.scan_options["STATS_INTERVAL"] <= 0:
+            self.worker.progress_signal.connect(self.show_scan_progress)
         # Connect finished signal to scan_finished slot
         self.worker.finished_signal.connect(self.scan_finished)
         self.worker.start()
         self.status_bar.showMessage(LogText.SCAN_STARTING)
 
+    def show_scan_progress(self, done, total):
+        self.status_bar.showMessage(LogText.SCAN_PROGRESS.format(done=done, total=total))
+
+    # stats: ScanStats snapshot
+    def show_scan_stats(self, stats):
+        if stats["stage"] == "fingerprinting" and stats["eta_s"] is not None:
+            self.status_bar.showMessage(LogText.SCAN_STATS_PROGRESS.format(
+                done=stats["batch_done"], total=stats["batch_total"], rate=stats["files_per_s"],
+                eta=ScanStats.format_duration(stats["eta_s"])))
+        elif stats["stage"] == "fingerprinting":
+            self.show_scan_progress(stats["batch_done"], stats["batch_total"])
+        else:
+            self.status_bar.showMessage(LogText.SCAN_STATS_STAGE.format(
+                stage=(stats["stage"] or "scanning").capitalize(), files=stats["files_enumerated"],
+                matches=stats["matches"], elapsed=ScanStats.format_duration(stats["elapsed_s"])))
+
     def stop_scan(self):
         if self.worker:
             self.worker.stop()
@@ -437,7 +489,9 @@ class PicDupScanGUI(QMainWindow):
     def scan_finished(self):
         self.toolbar.start_action.setEnabled(True)
         self.toolbar.stop_action.setEnabled(False)
+        self.toolbar.within_folder_action.setEnabled(True)
+        self.toolbar.watch_action.setEnabled(True)
         self.browse_target_btn.setEnabled(True)
-        self.browse_scan_btn.setEnabled(True)
+        self.browse_scan_btn.setEnabled(not self.toolbar.within_folder_action.isChecked())
         self.append_log(LogText.SCAN_FINISHED)
         self.status_bar.showMessage(LogText.SCAN_FINISHED)
\ No newline at end of file
@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# custom modules
+from .log_proc import Logger
+from .pic_similar_proc import PicSimilarProc
+from .fingerprint_store import FingerprintStore
+from .fingerprint_pool import FingerprintPool
+from .exact_dup_proc import ExactDupProc
+from .metadata_prefilter import MetadataPrefilter
+from .duplicate_groups import DuplicateGroups
+from .file_walker import FileWalker, FileStat
+from .directory_cache import DirectoryCache
+from .folder_watcher import FolderWatcher
+from .scan_stats import ScanStats
+from .settings.gui_text import LogText
+from .app_configs import AppConfigs
+
+# A matched pair of files
+@dataclass(frozen=True)
+class Match:
+    kind: str           # fingerprint kind: "IMAGE", "RAW", "RAW_PREVIEW" or "VIDEO"
+    file1: str          # target file (the earlier file within one folder)
+    file2: str
+    distance: int | None  # Hamming distance of the candidate hash (see PicFingerprint.distance), 0 for identical files
+
+# Shared stop request: cancel() from any thread ends the scan at the next check
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    # Sleep until cancelled or timeout seconds passed, returns is_cancelled()
+    def wait(self, timeout):
+        return self._event.wait(timeout)
+
+# What the watch mode keeps of a scanned scope, to match the files which change later
+@dataclass
+class WatchedScope:
+    kind: str
+    options: dict
+    walker: FileWalker                  # tells which changed files belong to the scope
+    log_text: str
+    match_func: object                  # MatchFunc(target_fps, scan_fps) of the scope
+    header_func: object = None
+    prefilter: MetadataPrefilter | None = None
+    headers: dict = field(default_factory=dict)
+    target_fps: dict = field(default_factory=dict)  # {path: fingerprint}
+    scan_fps: dict = field(default_factory=dict)
+    # Two folder mode: the scan files byte-identical to a target are not fingerprinted,
+    # {target path: (its fingerprint, [byte-identical scan files])} stands for them
+    scan_copies: dict = field(default_factory=dict)
+    exact_pairs: set = field(default_factory=set)   # (target, scan file) pairs reported as byte-identical
+    # {path: FileStat} of the files pruned by the prefilter, fingerprinted once a possible partner arrives
+    pruned_targets: dict = field(default_factory=dict)
+    pruned_scans: dict = field(default_factory=dict)
+    groups: DuplicateGroups | None = None           # single folder mode
+
+# =========================================================
+# The whole scan (listing, exact pre-pass, prefilter, fingerprinting, matching, watch mode)
+# without any GUI: the results are reported through the callbacks, the log through Logger.
+# Driven by the QtScanWorker thread in the GUI and directly by the command line scanner.
+# =========================================================
+class ScanEngine:
+
+    # How often the watch mode takes the settled changes (seconds)
+    _WATCH_INTERVAL = 0.5
+
+    # scan_folder_path None: find the duplicates within the target folder
+    # scan_scope, extension_filters, scan_options: as read by AppConfigs
+    # watch: after the scan, keep matching the files which change until the scan is stopped
+    # Callbacks (called from the thread running the scan): on_duplicate(file1, file2),
+    # on_group([sorted paths]) in the single folder mode, on_match(Match) for every matched pair of both modes,
+    # on_progress(fingerprinted files, files to fingerprint), on_file_removed(path) in watch mode
+    # on_stats(ScanStats snapshot) every STATS_INTERVAL seconds from the stats reporter thread, and once at the end
+    # cancel_token: CancelToken shared with the caller (stop() cancels it too)
+    # db_path: fingerprint store, None: the one of AppConfigs
+    # stats_path: file the final statistics are appended to, None: log/scan_stats.jsonl
+    # save_stats: False: the final statistics are only handed to on_stats, no file is written
+    # shutdown_wait: run() only returns once the fingerprinting processes have exited (e.g. to measure them)
+    def __init__(self, target_folder_path, scan_folder_path, scan_scope, extension_filters, scan_options, watch=False,
+                 on_duplicate=None, on_group=None, on_match=None, on_progress=None, on_file_removed=None, on_stats=None,
+                 cancel_token=None, db_path=None, stats_path=None, save_stats=True, shutdown_wait=False):
+        self.target_folder_path = target_folder_path
+        self.scan_folder_path = scan_folder_path
+        self.scan_scope = scan_scope
+        self.extension_filters = extension_filters
+        self.scan_options = scan_options
+        self.watch = watch
+        self.on_duplicate = on_duplicate or (lambda file1, file2: None)
+        self.on_group = on_group or (lambda files: None)
+        self.on_match = on_match or (lambda match: None)
+        self.on_progress = on_progress or (lambda done, total: None)
+        self.on_file_removed = on_file_removed or (lambda path: None)
+        self.on_stats = on_stats
+        self.cancel_token = cancel_token or CancelToken()
+        self.db_path = db_path or AppConfigs.get_fingerprint_db_path()
+        self.stats_path = stats_path
+        self.save_stats = save_stats
+        self.shutdown_wait = shutdown_wait
+        # ScanStats of the last run
+        self.stats = None
+        # exception which ended the last run (it is logged, not raised), None: no error
+        self.error = None
+        # time.monotonic() of the last progress record (see log_progress)
+        self._progress_log_time = None
+
+    def run(self):
+        store = None
+        pool = None
+        watcher = None
+        self.error = None
+        self.stats = ScanStats(self.scan_options["STATS_INTERVAL"], self.on_stats, self.stats_path, self.save_stats)
+        self.stats.start_reporter()
+        try:
+            # show scan scope to logviewer
+            scope_formatted = []
+            for k, v in self.scan_scope.items():
+                # Display Green Check for True, Red Cross for False (using Unicode)
+                mark = "✅" if v else "❌"
+                scope_formatted.append(f"{k}: {mark}")
+            
+            Logger.setLog(Logger.LOG_LV_INFO, LogText.SCAN_SCOPE.format(scope=", ".join(scope_formatted))) 
+
+            pic_proc = PicSimilarProc()
+
+            # The store must be opened in this thread (sqlite connections are bound to their thread)
+            store = FingerprintStore(self.db_path)
+            # the digests of the exact pre-pass are kept in the store too
+            exact_proc = ExactDupProc(store)
+            # Decoding and hashing run in worker processes, this thread only collects the fingerprints
+            pool = FingerprintPool(self.scan_options["WORKERS"])
+            # Listings of the unchanged directories are reused from the last successful scan
+            folders = [folder for folder in (self.target_folder_path, self.scan_folder_path) if folder is not None]
+            directory_cache = DirectoryCache(store.get_directory_listings(folders)) if self.scan_options["DIR_CACHE"] else None
+            # Watch mode: the events start before the scan, so no file arriving during the scan is missed
+            watched_scopes = []
+            if self.watch:
+                watcher = FolderWatcher(folders, self.scan_options["RECURSIVE"],
+                                        self.scan_options["WATCH_DEBOUNCE"], self.scan_options["WATCH_POLL_INTERVAL"])
+                watcher.start()
+
+            # RAW files are either compared by their exact sensor data or by their embedded previews
+            cutoffs = self.scan_options["HASH_CUTOFFS"]
+            match_mirrored = self.scan_options["MATCH_MIRRORED"]
+            match_images = lambda fps1, fps2: pic_proc.match_image_fingerprints(fps1, fps2, cutoffs=cutoffs, match_mirrored=match_mirrored)
+            match_images_within = lambda fps: pic_proc.match_image_fingerprints_within(fps, cutoffs=cutoffs, match_mirrored=match_mirrored)
+            # every hash of the cascade is computed from the same decode
+            image_options = {"hash_names": self.scan_options["HASH_CASCADE"]}
+            if self.scan_options["RAW_MATCH_MODE"] == "preview":
+                raw_kind, raw_options, match_raws, match_raws_within = "RAW_PREVIEW", image_options, match_images, match_images_within
+            else:
+                raw_kind, raw_options, match_raws, match_raws_within = "RAW", {}, pic_proc.match_raw_fingerprints, pic_proc.match_raw_fingerprints_within
+            # videos are compared by the pHashes of a few sampled keyframes
+            video_options = {"sample_count": self.scan_options["VIDEO_SAMPLES"]}
+            video_cutoff = self.scan_options["PHASH_CUTOFF"]
+            video_tolerance = self.scan_options["VIDEO_DURATION_TOLERANCE"]
+            match_videos = lambda fps1, fps2: pic_proc.match_video_fingerprints(fps1, fps2, cutoff=video_cutoff, duration_tolerance=video_tolerance)
+            match_videos_within = lambda fps: pic_proc.match_video_fingerprints_within(fps, cutoff=video_cutoff, duration_tolerance=video_tolerance)
+
+            # Define like function index
+            # Each config: (ScopeKey, FilterKey, FingerprintKind, FingerprintOptions, FindLog, TargetLog, ScanLog, HeaderFunc, MatchFunc, MatchWithinFunc)
+            # Every file is fingerprinted once (by the pool), then MatchFunc(target_fps, scan_fps) only works on the fingerprints
+            # (MatchWithinFunc(fps) when looking for duplicates within one folder)
+            # HeaderFunc reads the headers for the metadata prefilter (None: no prefilter)
+            scan_configs = [
+                ("IMAGE", "Image", "IMAGE",  image_options, LogText.FOUND_TARGET_IMAGES, LogText.TARGET_IMAGE, LogText.SCAN_IMAGE, pic_proc.read_image_header, match_images, match_images_within),
+                ("RAW",   "Raw",   raw_kind, raw_options,   LogText.FOUND_TARGET_RAWS,   LogText.TARGET_RAW,   LogText.SCAN_RAW,   None,                      match_raws,   match_raws_within),
+                ("VIDEO", "Video", "VIDEO",  video_options, LogText.FOUND_TARGET_VIDEOS, LogText.TARGET_VIDEO, LogText.SCAN_VIDEO, None,                      match_videos, match_videos_within),
+            ]
+
+            for scope_key, filter_key, fingerprint_kind, fingerprint_options, log_found, log_target, log_scan, header_func, match_func, match_within_func in scan_configs:
+                if not self.is_running(): break
+                
+                # Check if this category is enabled
+                if not self.scan_scope.get(scope_key, False):
+                    continue
+                if fingerprint_kind == "VIDEO" and not PicSimilarProc.VIDEO_SUPPORTED:
+                    Logger.setLog(Logger.LOG_LV_WARNING, LogText.VIDEO_UNSUPPORTED)
+                    continue
+
+                # Get files (the missing headers for the prefilter are read while the folders are still listed)
+                if header_func is None or not self.scan_options["PREFILTER_RULES"]:
+                    header_func = None
+                exts = self.extension_filters.get(filter_key)
+                prefilter = None
+                if header_func is not None:
+                    prefilter = MetadataPrefilter(self.scan_options["PREFILTER_RULES"], self.scan_options["ASPECT_TOLERANCE"])
+                watched_scope = WatchedScope(fingerprint_kind, fingerprint_options, self.create_walker(exts), log_target,
+                                             match_func, header_func, prefilter)
+                if self.watch:
+                    watched_scopes.append(watched_scope)
+
+                if self.scan_folder_path is None:
+                    (target_stats,), headers = self.collect_files([self.target_folder_path], exts, header_func, directory_cache, store)
+                    watched_scope.headers = headers
+                    watched_scope.groups = DuplicateGroups()
+                    if len(target_stats) > 1:
+                        Logger.setLog(Logger.LOG_LV_INFO, log_found.format(count=len(target_stats)))
+                        fps = self.scan_within_folder(target_stats, headers, prefilter, watched_scope.groups, fingerprint_kind,
+                                                      fingerprint_options, log_target, match_within_func, exact_proc, store, pool,
+                                                      watched_scope.pruned_targets)
+                        watched_scope.target_fps = {fp.path: fp for fp in fps}
+                    continue
+
+                (target_stats, scan_stats), headers = self.collect_files([self.target_folder_path, self.scan_folder_path], exts,
+                                                                         header_func, directory_cache, store)
+                watched_scope.headers = headers
+                target_sizes = {file: st.st_size for file, st in target_stats.items()}
+                scan_sizes = {file: st.st_size for file, st in scan_stats.items()}
+                target_files = sorted(target_sizes)
+                scan_files = sorted(scan_sizes)
+
+                if target_files and scan_files:
+                    Logger.setLog(Logger.LOG_LV_INFO, log_found.format(count=len(target_files)))
+
+                    # 0. Exact duplicate pre-pass: byte-identical files are reported right away, and the
+                    #    scan files are not decoded: the fingerprint of their first identical target stands for them
+                    with self.stats.stage("exact"):
+                        exact_pairs = exact_proc.find_exact_duplicates(target_sizes, scan_sizes, self.is_running,
+                                                                       {**target_stats, **scan_stats})
+                        self.add_bytes_read(exact_proc)
+                    Logger.setLog(Logger.LOG_LV_INFO, LogText.FOUND_EXACT_DUPLICATES.format(count=len(exact_pairs)))
+                    copy_targets = {}
+                    for file1, file2 in exact_pairs:
+                        self.report_duplicate(Match(fingerprint_kind, file1, file2, 0))
+                        copy_targets.setdefault(file2, file1)
+                    watched_scope.exact_pairs = set(exact_pairs)
+
+                    # 0.5. Metadata prefilter: headers only, files without any possible partner are not decoded
+                    #      (the identical scan files are still partners of the targets)
+                    if prefilter is not None:
+                        all_target_files, all_scan_files = target_files, scan_files
+                        target_files, scan_files = self.prefilter_files(prefilter, headers, target_files, scan_files)
+                        kept_files = set(target_files) | set(scan_files)
+                        watched_scope.pruned_targets = {file: target_stats[file] for file in all_target_files if file not in kept_files}
+                        watched_scope.pruned_scans = {file: scan_stats[file] for file in all_scan_files if file not in kept_files}
+                    scan_files = [file for file in scan_files if file not in copy_targets]
+
+                    # 1. Hashing stage: decode and hash each file exactly once
+                    target_fps = self.fingerprint_files(target_files, target_stats, fingerprint_kind, fingerprint_options, log_target, store, pool)
+                    scan_fps = self.fingerprint_files(scan_files, scan_stats, fingerprint_kind, fingerprint_options, log_scan, store, pool)
+                    store.commit()
+                    watched_scope.target_fps = {fp.path: fp for fp in target_fps}
+                    watched_scope.scan_fps = {fp.path: fp for fp in scan_fps}
+                    for file2, file1 in sorted(copy_targets.items()):
+                        if file1 in watched_scope.target_fps:
+                            watched_scope.scan_copies.setdefault(file1, (watched_scope.target_fps[file1], []))[1].append(file2)
+
+                    # 2. Match stage: only works on the precomputed fingerprints
+                    self.stats.add("pairs_compared", len(target_fps) * (len(scan_fps) + len(watched_scope.scan_copies)))
+                    self.report_matches(watched_scope, match_func(target_fps, scan_fps))
+                    self.report_copy_matches(watched_scope, target_fps)
+
+            # Only a complete walk may replace the stored listings
+            if self.is_running() and directory_cache is not None:
+                Logger.setLog(Logger.LOG_LV_INFO, LogText.DIRECTORY_CACHED.format(
+                    cached=directory_cache.reused_count, total=directory_cache.reused_count + directory_cache.listed_count))
+                store.put_directory_listings(directory_cache.updated_listings(), directory_cache.stale_paths())
+
+            if watcher is not None and self.is_running():
+                self.watch_folders(watcher, watched_scopes, store, pool)
+        
+        except Exception as e:
+            self.error = e
+            Logger.setLog(Logger.LOG_LV_ERROR, LogText.SCAN_ERROR.format(error=str(e)))
+        finally:
+            if watcher is not None:
+                watcher.stop()
+            if pool is not None:
+                pool.shutdown(self.shutdown_wait)
+            if store is not None:
+                store.close()
+            self.stats.finish()
+
+    # List the folders (recursively, see FileWalker) and get the header of every file as soon as
+    # it is found (header_func None: no headers): from the store while the file is unchanged, else
+    # read by WALK_THREADS reader threads while the other directories are still listed.
+    # Returns ([{path: FileStat} of each folder], {path: header})
+    def collect_files(self, folders, exts, header_func, directory_cache, store):
+        walker = self.create_walker(exts, directory_cache)
+        stats = {folder: {} for folder in folders}
+        headers = {}
+        # {path: (FileStat, future of header_func)} of the headers being read
+        reads = {}
+        with self.stats.stage("listing"), ThreadPoolExecutor(max_workers=self.scan_options["WALK_THREADS"]) as readers:
+            for folder, file, file_stat in walker.walk(folders, self.is_running):
+                stats[folder][file] = file_stat
+                self.stats.add("files_enumerated")
+                self.stats.add("bytes_enumerated", file_stat.st_size)
+                if header_func is not None and file not in headers and file not in reads:
+                    header = store.get_header(file, file_stat)
+                    if header is not None:
+                        headers[file] = header
+                    else:
+                        reads[file] = (file_stat, readers.submit(header_func, file))
+
+            # the store is only used by this thread (sqlite connections are bound to their thread)
+            for file, (file_stat, future) in reads.items():
+                if not self.is_running():
+                    readers.shutdown(wait=False, cancel_futures=True)
+                    break
+                header = future.result()
+                if header is not None:
+                    headers[file] = header
+                    store.put_header(file, file_stat, header)
+        return [stats[folder] for folder in folders], headers
+
+    def create_walker(self, exts, directory_cache=None):
+        return FileWalker(exts, self.scan_options["RECURSIVE"], self.scan_options["INCLUDE_GLOBS"],
+                          self.scan_options["EXCLUDE_GLOBS"], self.scan_options["WALK_THREADS"], directory_cache)
+
+    # Returns (kept target files, kept scan files)
+    def prefilter_files(self, prefilter, headers, target_files, scan_files):
+        pruned_before = sum(prefilter.pruned_pairs.values())
+        with self.stats.stage("prefilter"):
+            kept_targets, kept_scans = prefilter.prune(
+                [headers[file] for file in target_files if file in headers],
+                [headers[file] for file in scan_files if file in headers]
+            )
+        self.stats.add("pairs_pruned", sum(prefilter.pruned_pairs.values()) - pruned_before)
+        counts = ", ".join(f"{rule}: {count}" for rule, count in prefilter.pruned_pairs.items())
+        skipped = len(target_files) + len(scan_files) - len(kept_targets) - len(kept_scans)
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.PREFILTER_PRUNED.format(counts=counts, skipped=skipped))
+
+        return ([file for file in target_files if file in kept_targets],
+                [file for file in scan_files if file in kept_scans])
+
+    # Find the duplicates within one folder: each unordered pair is checked at most once,
+    # then the matched pairs are merged into duplicate groups (A == B and B == C: one group).
+    # stats: {path: FileStat}, headers: {path: header} for the metadata prefilter (prefilter None: no prefilter)
+    # pruned: {path: FileStat} filled with the files pruned by the prefilter
+    # The matches are merged into groups. Returns the fingerprints.
+    def scan_within_folder(self, stats, headers, prefilter, groups, kind, options, log_text, match_within_func, exact_proc, store, pool,
+                           pruned):
+        sizes = {file: st.st_size for file, st in stats.items()}
+
+        # 0. Exact duplicate pre-pass: only the first file of each byte-identical group is decoded,
+        #    its perceptual matches join the whole group
+        with self.stats.stage("exact"):
+            exact_groups = exact_proc.find_exact_groups(sizes, self.is_running, stats)
+            self.add_bytes_read(exact_proc)
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.FOUND_EXACT_DUPLICATES.format(count=sum(len(group) - 1 for group in exact_groups)))
+        identical_files = set()
+        for group in exact_groups:
+            for file in group[1:]:
+                self.join_group(groups, Match(kind, group[0], file, 0))
+                identical_files.add(file)
+        files = [file for file in sorted(sizes) if file not in identical_files]
+
+        # 0.5. Metadata prefilter: files without any possible partner are not decoded
+        if prefilter is not None:
+            kept_files = self.prefilter_files_within(prefilter, headers, files)
+            pruned.update((file, stats[file]) for file in set(files).difference(kept_files))
+            files = kept_files
+
+        # 1. Hashing stage
+        fps = self.fingerprint_files(files, stats, kind, options, log_text, store, pool)
+        store.commit()
+
+        # 2. Match stage
+        self.stats.add("pairs_compared", len(fps) * (len(fps) - 1) // 2)
+        with self.stats.stage("matching"):
+            for fp1, fp2 in match_within_func(fps):
+                if not self.is_running(): break
+                if ScanEngine.is_possible_pair(prefilter, headers, fp1.path, fp2.path):
+                    self.join_group(groups, Match(kind, fp1.path, fp2.path, self.match_distance(fp1, fp2)))
+
+        duplicate_groups = groups.groups()
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.FOUND_DUPLICATE_GROUPS.format(count=len(duplicate_groups)))
+        for group in duplicate_groups:
+            self.report_duplicate_group(group)
+        return fps
+
+    # Single folder version of prefilter_files: returns the kept files
+    def prefilter_files_within(self, prefilter, headers, files):
+        pruned_before = sum(prefilter.pruned_pairs.values())
+        with self.stats.stage("prefilter"):
+            kept = prefilter.prune_within([headers[file] for file in files if file in headers])
+        self.stats.add("pairs_pruned", sum(prefilter.pruned_pairs.values()) - pruned_before)
+        counts = ", ".join(f"{rule}: {count}" for rule, count in prefilter.pruned_pairs.items())
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.PREFILTER_PRUNED.format(counts=counts, skipped=len(files) - len(kept)))
+
+        return [file for file in files if file in kept]
+
+    # False if the pair is the same file, or is rejected by the metadata prefilter
+    @staticmethod
+    def is_possible_pair(prefilter, headers, file1, file2):
+        # a scan folder inside the target folder lists some files on both sides
+        if os.path.abspath(file1) == os.path.abspath(file2):
+            return False
+        header1, header2 = headers.get(file1), headers.get(file2)
+        if prefilter is None or header1 is None or header2 is None:
+            return True
+        return prefilter.reject_rule(header1, header2) is None
+
+    # matches: (target fingerprint, [matched scan fingerprints]) from a MatchFunc
+    # (the matching itself runs while the matches are taken)
+    def report_matches(self, scope, matches):
+        with self.stats.stage("matching"):
+            for fp1, matched_fps in matches:
+                if not self.is_running(): break
+
+                for fp2 in matched_fps:
+                    if ScanEngine.is_possible_pair(scope.prefilter, scope.headers, fp1.path, fp2.path):
+                        self.report_duplicate(Match(scope.kind, fp1.path, fp2.path, self.match_distance(fp1, fp2)))
+
+    # Match the targets against the fingerprints standing for the byte-identical scan files (see WatchedScope):
+    # a target matching one matches each of its scan files, the pairs reported as identical excepted
+    def report_copy_matches(self, scope, target_fps):
+        if not scope.scan_copies:
+            return
+        with self.stats.stage("matching"):
+            for fp1, matched_fps in scope.match_func(target_fps, [fp for fp, _ in scope.scan_copies.values()]):
+                if not self.is_running(): break
+
+                for fp2 in matched_fps:
+                    for file2 in scope.scan_copies[fp2.path][1]:
+                        if (fp1.path, file2) not in scope.exact_pairs and \
+                                ScanEngine.is_possible_pair(scope.prefilter, scope.headers, fp1.path, file2):
+                            self.report_duplicate(Match(scope.kind, fp1.path, file2, self.match_distance(fp1, fp2)))
+
+    # Watch mode: take the settled changes until the scan is stopped.
+    # Deleted files leave the index and the results, created or modified files are fingerprinted
+    # and matched against the fingerprints kept from the scan.
+    def watch_folders(self, watcher, watched_scopes, store, pool):
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.WATCH_STARTED.format(backend=watcher.backend))
+        while not self.cancel_token.wait(ScanEngine._WATCH_INTERVAL):
+            changed, deleted = watcher.take_settled()
+            if not changed and not deleted:
+                continue
+
+            for scope in watched_scopes:
+                if not self.is_running(): break
+                self.remove_watched_files(scope, deleted, store)
+                self.update_watched_files(scope, changed, store, pool)
+            store.commit()
+
+    # deleted: deleted files or directories
+    def remove_watched_files(self, scope, deleted, store):
+        removed = set()
+        for path in deleted:
+            prefix = os.path.join(path, "")
+            for fps in (scope.target_fps, scope.scan_fps):
+                for file in [file for file in fps if file == path or file.startswith(prefix)]:
+                    del fps[file]
+                    store.remove(scope.kind, file)
+                    removed.add(file)
+            # the fingerprint of a deleted target still stands for its identical scan files
+            for _, copies in scope.scan_copies.values():
+                for file in [file for file in copies if file == path or file.startswith(prefix)]:
+                    copies.remove(file)
+                    removed.add(file)
+            for pruned in (scope.pruned_targets, scope.pruned_scans):
+                for file in [file for file in pruned if file == path or file.startswith(prefix)]:
+                    del pruned[file]
+        scope.scan_copies = {file: entry for file, entry in scope.scan_copies.items() if entry[1]}
+
+        for file in sorted(removed):
+            Logger.setLog(Logger.LOG_LV_INFO, LogText.WATCH_REMOVED.format(path=os.path.basename(file)))
+            self.on_file_removed(file)
+
+    def update_watched_files(self, scope, changed, store, pool):
+        target_files = [file for file in changed if scope.walker.accepts(self.target_folder_path, file)]
+        scan_files = []
+        if self.scan_folder_path is not None:
+            scan_files = [file for file in changed if scope.walker.accepts(self.scan_folder_path, file)]
+        if not target_files and not scan_files:
+            return
+
+        stats = self.stat_files(dict.fromkeys(target_files + scan_files))
+        if scope.header_func is not None:
+            for file in stats:
+                header = scope.header_func(file)
+                if header is not None:
+                    scope.headers[file] = header
+                    store.put_header(file, stats[file], header)
+
+        # the pruned files which may match a new file are fingerprinted now
+        for pruned in (scope.pruned_targets, scope.pruned_scans):
+            for file in stats:
+                pruned.pop(file, None)
+        if scope.prefilter is not None:
+            partner_targets = self.take_pruned_partners(scope, scope.pruned_targets,
+                                                        scan_files if self.scan_folder_path is not None else target_files)
+            partner_scans = self.take_pruned_partners(scope, scope.pruned_scans, target_files)
+            target_files += list(partner_targets)
+            scan_files += list(partner_scans)
+            stats = {**partner_targets, **partner_scans, **stats}
+
+        new_target_fps = self.fingerprint_files([file for file in target_files if file in stats], stats,
+                                                scope.kind, scope.options, scope.log_text, store, pool)
+        new_scan_fps = self.fingerprint_files([file for file in scan_files if file in stats], stats,
+                                              scope.kind, scope.options, scope.log_text, store, pool)
+        old_target_fps = [fp for file, fp in scope.target_fps.items() if file not in stats]
+        # changed identical scan files are fingerprinted like the others from now on
+        for _, copies in scope.scan_copies.values():
+            copies[:] = [file for file in copies if file not in stats]
+        scope.scan_copies = {file: entry for file, entry in scope.scan_copies.items() if entry[1]}
+        scope.exact_pairs = {pair for pair in scope.exact_pairs if pair[0] not in stats and pair[1] not in stats}
+        scope.target_fps.update((fp.path, fp) for fp in new_target_fps)
+        scope.scan_fps.update((fp.path, fp) for fp in new_scan_fps)
+
+        if scope.groups is not None:
+            self.update_watched_groups(scope, new_target_fps)
+            return
+
+        # new targets against all scan files, then the older targets against the new scan files
+        self.stats.add("pairs_compared", len(new_target_fps) * (len(scope.scan_fps) + len(scope.scan_copies))
+                       + len(old_target_fps) * len(new_scan_fps))
+        self.report_matches(scope, scope.match_func(new_target_fps, list(scope.scan_fps.values())))
+        self.report_copy_matches(scope, new_target_fps)
+        self.report_matches(scope, scope.match_func(old_target_fps, new_scan_fps))
+
+    # Take the pruned files ({path: FileStat}) which the prefilter does not reject with one of files
+    def take_pruned_partners(self, scope, pruned, files):
+        new_headers = [scope.headers[file] for file in files if file in scope.headers]
+        partners = {file: st for file, st in pruned.items()
+                    if file in scope.headers and any(scope.prefilter.reject_rule(header, scope.headers[file]) is None
+                                                     for header in new_headers)}
+        for file in partners:
+            del pruned[file]
+        return partners
+
+    # Single folder mode: merge the new matches into the groups, and report the groups which grew
+    def update_watched_groups(self, scope, new_fps):
+        grown = set()
+        # two new files meet from both sides
+        matched_pairs = set()
+        self.stats.add("pairs_compared", len(new_fps) * len(scope.target_fps))
+        with self.stats.stage("matching"):
+            for fp1, matched_fps in scope.match_func(new_fps, list(scope.target_fps.values())):
+                for fp2 in matched_fps:
+                    pair = frozenset((fp1.path, fp2.path))
+                    if pair in matched_pairs:
+                        continue
+                    matched_pairs.add(pair)
+                    if ScanEngine.is_possible_pair(scope.prefilter, scope.headers, fp1.path, fp2.path):
+                        self.join_group(scope.groups, Match(scope.kind, fp1.path, fp2.path, self.match_distance(fp1, fp2)))
+                        grown.add(fp1.path)
+
+        for root in sorted({scope.groups.find(file) for file in grown}):
+            # files deleted since the scan are still members of the groups
+            group = [file for file in scope.groups.group_of(root) if os.path.exists(file)]
+            if len(group) > 1:
+                self.report_duplicate_group(group)
+
+    def stat_files(self, files):
+        stats = {}
+        for file in files:
+            try:
+                st = os.stat(file)
+            except OSError as e:
+                Logger.setLog(Logger.LOG_LV_ERROR, LogText.SCAN_ERROR.format(error=str(e)))
+                continue
+            stats[file] = FileStat(st.st_size, st.st_mtime_ns, st.st_ino)
+        return stats
+
+    # Distance reported with a match: the first hash of the cascade for images
+    def match_distance(self, fp1, fp2):
+        return fp1.distance(fp2, self.scan_options["HASH_CASCADE"][0], self.scan_options["MATCH_MIRRORED"])
+
+    def report_duplicate(self, match):
+        match_msg = LogText.SCAN_MATCH.format(file1=os.path.basename(match.file1), file2=os.path.basename(match.file2))
+        Logger.setLog(Logger.LOG_LV_INFO, match_msg)
+        self.stats.add("matches")
+        self.on_match(match)
+        self.on_duplicate(match.file1, match.file2)
+
+    # Single folder mode: the groups are reported once they are complete, the pairs right away
+    def join_group(self, groups, match):
+        groups.union(match.file1, match.file2)
+        self.stats.add("matches")
+        self.on_match(match)
+
+    def report_duplicate_group(self, files):
+        group_msg = LogText.SCAN_GROUP.format(files=" == ".join(os.path.basename(file) for file in files))
+        Logger.setLog(Logger.LOG_LV_INFO, group_msg)
+        self.on_group(files)
+
+    # Fingerprint every file once; unreadable files are skipped.
+    # Unchanged files are taken from the fingerprint store, checked with the stats from
+    # the directory walk (stats: {path: FileStat}), the others are sent to the process pool.
+    # The fingerprints keep the order of files.
+    # options: keyword arguments of the fingerprint method (e.g. the hash_names of the cascade)
+    def fingerprint_files(self, files, stats, kind, options, log_text, store, pool):
+        with self.stats.stage("fingerprinting"):
+            fingerprints = {}
+            file_stats = {}
+            for file in files:
+                if not self.is_running(): break
+
+                st = stats[file]
+                fingerprint = store.get(kind, file, st)
+                # a stored fingerprint computed with other options has to be computed again
+                if fingerprint is not None and fingerprint.fits_options(options):
+                    fingerprints[file] = fingerprint
+                else:
+                    file_stats[file] = st
+
+            cached_count = len(fingerprints)
+            Logger.setLog(Logger.LOG_LV_INFO, LogText.FINGERPRINT_CACHED.format(cached=cached_count, total=len(files)))
+            self.stats.add("files_cached", cached_count)
+
+            done_count = 0
+            self.stats.set_batch(done_count, len(file_stats))
+            self.on_progress(done_count, len(file_stats))
+            for file, fingerprint in pool.fingerprint_files(kind, list(file_stats), self.is_running, options):
+                done_count += 1
+                if Logger.isLevelEnabled(Logger.LOG_LV_DEBUG):
+                    Logger.setLog(Logger.LOG_LV_DEBUG, log_text.format(path=os.path.basename(file)))
+                self.log_progress(done_count, len(file_stats), file)
+                self.add_fingerprint_stats(pool, file_stats[file])
+                self.stats.set_batch(done_count, len(file_stats))
+                self.on_progress(done_count, len(file_stats))
+                if fingerprint is not None:
+                    store.put(kind, file, file_stats[file], fingerprint)
+                    fingerprints[file] = fingerprint
+            self.add_fingerprint_stats(pool)
+
+            return [fingerprints[file] for file in files if file in fingerprints]
+
+    # Progress record instead of a line per file: at most PROGRESS_LOG_RATE per second,
+    # and always the last file of the batch
+    def log_progress(self, done, total, file):
+        now = time.monotonic()
+        rate = self.scan_options["PROGRESS_LOG_RATE"]
+        if done < total and (rate == 0 or (self._progress_log_time is not None and now - self._progress_log_time < 1 / rate)):
+            return
+        self._progress_log_time = now
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.FINGERPRINT_PROGRESS.format(done=done, total=total, path=os.path.basename(file)))
+
+    # A file came back from the pool (file_stat None: only update the pool times and queues).
+    # The decoding reads the whole file, except for the keyframes of a video.
+    def add_fingerprint_stats(self, pool, file_stat=None):
+        if file_stat is not None:
+            self.stats.add("files_fingerprinted")
+            self.stats.add("bytes_read", file_stat.st_size)
+        self.stats.set("decode_ms", pool.decode_seconds * 1000)
+        self.stats.set("hash_ms", pool.hash_seconds * 1000)
+        self.stats.set("fingerprint_pending", pool.pending_count)
+        self.stats.set("fingerprint_in_flight", pool.in_flight_count)
+
+    # Bytes read by the exact pre-pass since the last call
+    def add_bytes_read(self, exact_proc):
+        self.stats.add("bytes_read", exact_proc.bytes_read)
+        exact_proc.bytes_read = 0
+
+    def is_running(self):
+        return not self.cancel_token.is_cancelled()
+
+    def stop(self):
+        self.cancel_token.cancel()
\ No newline at end of file
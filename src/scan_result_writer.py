@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import csv
+import json
+
+# =========================================================
+# Writes the scan results to a text stream as they are found:
+#   jsonl: one JSON object per line, {"file1": ..., "file2": ...} for a pair,
+#          {"group": [...]} for a duplicate group (single folder mode)
+#   csv:   "file1,file2" rows for pairs, "group,path" rows for groups (one row per file of
+#          a group, numbered from 1); the header is written with the first row
+# Every record is flushed, so a reader of the stream sees the results while the scan goes on.
+# =========================================================
+class ScanResultWriter:
+
+    FORMATS = ("jsonl", "csv")
+
+    def __init__(self, stream, output_format="jsonl"):
+        if output_format not in ScanResultWriter.FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.stream = stream
+        self.output_format = output_format
+        self.pair_count = 0
+        self.group_count = 0
+        self._csv = csv.writer(stream) if output_format == "csv" else None
+        self._csv_header = None
+
+    def write_pair(self, file1, file2):
+        self.pair_count += 1
+        if self._csv is not None:
+            self._write_csv_header(["file1", "file2"])
+            self._csv.writerow([file1, file2])
+        else:
+            self.stream.write(json.dumps({"file1": file1, "file2": file2}, ensure_ascii=False) + "\n")
+        self.flush()
+
+    def write_group(self, files):
+        self.group_count += 1
+        if self._csv is not None:
+            self._write_csv_header(["group", "path"])
+            self._csv.writerows([self.group_count, file] for file in files)
+        else:
+            self.stream.write(json.dumps({"group": files}, ensure_ascii=False) + "\n")
+        self.flush()
+
+    # a scan reports either pairs or groups, so there is one header
+    def _write_csv_header(self, header):
+        if self._csv_header is None:
+            self._csv_header = header
+            self._csv.writerow(header)
+
+    def flush(self):
+        self.stream.flush()
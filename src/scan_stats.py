@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .log_proc import Logger
+from .path_proc import PathProc
+from .settings.gui_text import LogText
+
+# =========================================================
+# Counters and timers of one scan, to tell which stage a slow scan spends its time in:
+#   files_enumerated, bytes_enumerated   listed files and their sizes (from the directory entries)
+#   bytes_read            read by the exact pre-pass and by the decoding of the fingerprinted files
+#   decode_ms, hash_ms    time of the fingerprinting workers, summed over the processes
+#   files_cached          fingerprints taken from the store instead of being computed
+#   files_fingerprinted   fingerprints computed
+#   pairs_compared        fingerprint pairs covered by the match stage
+#   pairs_pruned          pairs never compared, rejected by the metadata prefilter from the headers
+#   matches               matched pairs, the byte-identical ones included
+#   fingerprint_pending, fingerprint_in_flight   queue depths of the fingerprinting pool
+# and the wall time of each stage (listing, exact, prefilter, fingerprinting, matching).
+# A reporter thread hands a snapshot to on_stats every interval seconds while the scan runs,
+# and finish() logs a summary and appends the final snapshot to log/scan_stats.jsonl (unless save_report is off).
+# The counters are only changed by the thread running the scan.
+# =========================================================
+class ScanStats:
+
+    COUNTERS = ("files_enumerated", "bytes_enumerated", "bytes_read", "decode_ms", "hash_ms",
+                "files_cached", "files_fingerprinted", "pairs_compared", "pairs_pruned", "matches",
+                "fingerprint_pending", "fingerprint_in_flight")
+    STAGES = ("listing", "exact", "prefilter", "fingerprinting", "matching")
+
+    _REPORT_FILE_NAME = "scan_stats.jsonl"
+
+    # on_stats(snapshot dict), called from the reporter thread; report_path None: log/scan_stats.jsonl
+    # save_report False: no report file
+    def __init__(self, interval=1.0, on_stats=None, report_path=None, save_report=True):
+        self.interval = interval
+        self.on_stats = on_stats or (lambda stats: None)
+        self.report_path = report_path
+        self.save_report = save_report
+        self.counters = dict.fromkeys(ScanStats.COUNTERS, 0)
+        self.stages_ms = dict.fromkeys(ScanStats.STAGES, 0.0)
+        self.start = time.perf_counter()
+        self.end = None
+        self._lock = threading.Lock()
+        # (stage, perf_counter at its start) of the running stage
+        self._stage = None
+        self._stage_start = 0.0
+        # files of the running fingerprinting batch: (done, total)
+        self._batch = (0, 0)
+        self._stop_event = threading.Event()
+        self._reporter = None
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def set(self, name, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def set_batch(self, done, total):
+        self._batch = (done, total)
+
+    # Time a stage; a stage entered again (e.g. in watch mode) adds to its time
+    @contextmanager
+    def stage(self, name):
+        with self._lock:
+            outer = self._stage
+            if outer is not None:
+                self.stages_ms[outer] += (time.perf_counter() - self._stage_start) * 1000
+            self._stage, self._stage_start = name, time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages_ms[name] += (time.perf_counter() - self._stage_start) * 1000
+                self._stage, self._stage_start = outer, time.perf_counter()
+
+    def snapshot(self):
+        with self._lock:
+            now = time.perf_counter() if self.end is None else self.end
+            counters = dict(self.counters)
+            stages_ms = dict(self.stages_ms)
+            if self._stage is not None and self.end is None:
+                stages_ms[self._stage] += (now - self._stage_start) * 1000
+            stage = self._stage
+
+        # throughput of the fingerprinting, and the time left for the running batch at that rate
+        fingerprint_seconds = stages_ms["fingerprinting"] / 1000
+        files_per_s = counters["files_fingerprinted"] / fingerprint_seconds if fingerprint_seconds > 0 else None
+        done, total = self._batch
+        eta_s = None
+        if stage == "fingerprinting" and files_per_s:
+            eta_s = round((total - done) / files_per_s, 1)
+        return {
+            "elapsed_s": round(now - self.start, 3),
+            "stage": stage,
+            "batch_done": done,
+            "batch_total": total,
+            "files_per_s": round(files_per_s, 1) if files_per_s is not None else None,
+            "eta_s": eta_s,
+            **{name: round(value, 1) if isinstance(value, float) else value for name, value in counters.items()},
+            "stages_ms": {name: round(ms, 1) for name, ms in stages_ms.items()},
+        }
+
+    def start_reporter(self):
+        if self.interval > 0 and self._reporter is None:
+            self._reporter = threading.Thread(target=self._report_loop, daemon=True)
+            self._reporter.start()
+
+    def _report_loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.on_stats(self.snapshot())
+
+    # Stop the reporter, report the final snapshot, log the summary and save the report
+    def finish(self):
+        self._stop_event.set()
+        if self._reporter is not None:
+            self._reporter.join()
+        with self._lock:
+            self.end = time.perf_counter()
+        stats = self.snapshot()
+        self.on_stats(stats)
+
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.SCAN_STATS.format(
+            seconds=stats["elapsed_s"], files=stats["files_enumerated"], fingerprinted=stats["files_fingerprinted"],
+            rate=stats["files_per_s"] or 0, compared=stats["pairs_compared"], pruned=stats["pairs_pruned"],
+            matches=stats["matches"]))
+
+        if not self.save_report:
+            return stats
+        report = {"time": datetime.datetime.now().isoformat(timespec="seconds"), **stats}
+        try:
+            report_path = self.report_path
+            if report_path is None:
+                log_dir = os.path.join(PathProc.get_real_base_path(), "log")
+                os.makedirs(log_dir, exist_ok=True)
+                report_path = os.path.join(log_dir, ScanStats._REPORT_FILE_NAME)
+            with open(report_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+        except OSError as e:
+            Logger.setLog(Logger.LOG_LV_ERROR, f"Error saving the scan statistics: {e}")
+        return stats
+
+    # seconds -> "h:mm:ss" or "m:ss"
+    @staticmethod
+    def format_duration(seconds):
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
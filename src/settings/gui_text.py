@@ -40,6 +40,8 @@ class AppText:
     BUTTON_START_SCAN: str = "Start Scan"
     BUTTON_STOP_SCAN: str = "Stop Scan"
     BUTTON_SWITCH_SCAN: str = "Scanning Scope"
+    BUTTON_WITHIN_FOLDER: str = "Within Target Folder"
+    BUTTON_WATCH_FOLDERS: str = "Watch Folders"
     BUTTON_EDIT: str = "Edit"
 
     # Tree View Text
@@ -60,20 +62,41 @@ class LogText:
     SCAN_IMAGE: str = "Scan Image: {path}"
     TARGET_RAW: str = "Target Raw: {path}"
     SCAN_RAW: str = "Scan Raw: {path}"
+    TARGET_VIDEO: str = "Target Video: {path}"
+    SCAN_VIDEO: str = "Scan Video: {path}"
     SCAN_MATCH: str = "✅ MATCH: {file1} == {file2}"
+    SCAN_GROUP: str = "✅ GROUP: {files}"
     NO_TARGET_FILES: str = "No target image/raw files found in {path}"
     NO_SCAN_FILES: str = "No scan image/raw files found in {path}"
     FOUND_TARGET_IMAGES: str = "Found {count} target images. Starting comparison..."
     FOUND_TARGET_RAWS: str = "Found {count} target raws. Starting comparison..."
+    FOUND_TARGET_VIDEOS: str = "Found {count} target videos. Starting comparison..."
+    VIDEO_UNSUPPORTED: str = "Video scan skipped: PyAV (pip install av) is not installed."
+    FOUND_EXACT_DUPLICATES: str = "Found {count} byte-identical duplicates."
+    FOUND_DUPLICATE_GROUPS: str = "Found {count} duplicate groups."
+    PREFILTER_PRUNED: str = "Prefilter pruned pairs: {counts}, files without possible match: {skipped}"
+    FINGERPRINT_CACHED: str = "Fingerprints reused from index: {cached}/{total}"
+    FINGERPRINT_PROGRESS: str = "Fingerprinted {done}/{total}: {path}"
+    DIRECTORY_CACHED: str = "Directory listings reused from index: {cached}/{total}"
+    WATCH_STARTED: str = "[Watching the folders for changes ({backend}), stop the scan to end...]"
+    WATCH_REMOVED: str = "Removed: {path}"
 
     SCAN_READY: str = "Ready"
     SCAN_SCOPE: str = "Scan Scope: {scope}"
     SCAN_STARTING: str = "[Scan Starting...]"
     SCAN_STOPPING: str = "[Scan Stopping...]"
     SCAN_FINISHED: str = "[Scan Finished]"
+    SCAN_PROGRESS: str = "Fingerprinting {done}/{total}..."
+    SCAN_STATS_PROGRESS: str = "Fingerprinting {done}/{total}, {rate} files/s, ETA {eta}"
+    SCAN_STATS_STAGE: str = "{stage}: {files} files listed, {matches} matches, {elapsed}"
+    SCAN_STATS: str = "Scan took {seconds} s: {files} files listed, {fingerprinted} fingerprinted ({rate} files/s), {compared} pairs compared, {pruned} pruned, {matches} matches"
 
     SCAN_ERROR: str = "Scan error: {error}"
 
+    STARTUP_TIME: str = "Startup took {total} ms ({stages}), {modules} modules"
+    STARTUP_SLOW: str = "Startup is slower than the target of {target} ms"
+    STARTUP_EAGER_IMPORTS: str = "Imported at startup: {modules}"
+
 @dataclass(frozen=True)
 class MenuText:
     EXIF: str = "Show Exif"
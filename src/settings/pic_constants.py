@@ -20,4 +20,7 @@ class PicConst:
         '.mxf',                             # Professional (Canon, Sony)
         '.wmv', '.mpg', '.mpeg',            # General
         '.webm', '.flv', '.3gp'             # Other
-    }
\ No newline at end of file
+    }
+
+    # Perceptual hashes which can be used in the hash cascade (cheapest first)
+    HASH_NAMES = ("ahash", "dhash", "phash", "whash", "colorhash")
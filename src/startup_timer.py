@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ===============================================================================================
+
+import datetime
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from .log_proc import Logger
+from .path_proc import PathProc
+from .settings.gui_text import LogText
+
+# =========================================================
+# Startup timing report: how long each step of the start took (imports, QApplication,
+# main window, first event loop pass), and whether a heavy module was imported before
+# it was needed. Every start is appended to log/startup_timing.jsonl, so the cold start
+# can be compared across versions. (python -X importtime main.py gives the per-module
+# breakdown of the import steps.)
+# =========================================================
+class StartupTimer:
+
+    # Cold start the application should stay under (milliseconds)
+    TARGET_MS = 1000
+
+    # Only needed by a scan or a preview, so they must not be imported at startup
+    _DEFERRED_MODULES = ("rawpy", "imagehash", "numpy", "PIL", "exifread", "send2trash")
+
+    _REPORT_FILE_NAME = "startup_timing.jsonl"
+
+    # start: time.perf_counter() taken as early as possible
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        stage_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+    def report(self):
+        return {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 1),
+            "target_ms": StartupTimer.TARGET_MS,
+            "stages_ms": dict(self.stages),
+            "module_count": len(sys.modules),
+            "deferred_modules_loaded": [name for name in StartupTimer._DEFERRED_MODULES if name in sys.modules],
+        }
+
+    # Log the report and append it to the report file
+    def finish(self):
+        report = self.report()
+        stages = ", ".join(f"{name}: {ms} ms" for name, ms in report["stages_ms"].items())
+        Logger.setLog(Logger.LOG_LV_INFO, LogText.STARTUP_TIME.format(total=report["total_ms"], stages=stages, modules=report["module_count"]))
+        if report["total_ms"] > StartupTimer.TARGET_MS:
+            Logger.setLog(Logger.LOG_LV_WARNING, LogText.STARTUP_SLOW.format(target=StartupTimer.TARGET_MS))
+        if report["deferred_modules_loaded"]:
+            Logger.setLog(Logger.LOG_LV_WARNING, LogText.STARTUP_EAGER_IMPORTS.format(modules=", ".join(report["deferred_modules_loaded"])))
+
+        try:
+            log_dir = os.path.join(PathProc.get_real_base_path(), "log")
+            os.makedirs(log_dir, exist_ok=True)
+            with open(os.path.join(log_dir, StartupTimer._REPORT_FILE_NAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+        except OSError as e:
+            Logger.setLog(Logger.LOG_LV_ERROR, f"Error saving the startup timing report: {e}")
+        return report